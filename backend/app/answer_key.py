@@ -0,0 +1,92 @@
+from array import array
+from typing import Dict, Optional
+from sqlalchemy import select
+from app import database
+from app.config import get_settings
+from app.dataset import DatasetCache
+from app.memory_store import get_store
+from app.models import QuizQuestion
+
+# Ключ ответов викторины в памяти.
+# Для проверки ответа нужны только верная буква, очки и объяснение, а не вся
+# строка вопроса с текстом и вариантами. Ключ хранит их компактно: по id вопроса —
+# номер в массивах, буквы — одной строкой, очки — массивом чисел, объяснения —
+# одним буфером UTF-8 со смещениями. Проверка не открывает сессию БД.
+# Ключ строится один раз после заполнения БД
+
+settings = get_settings()
+
+
+class AnswerKey:
+    """Верные ответы, очки и объяснения по id вопроса"""
+
+    __slots__ = ("slots", "letters", "points", "offsets", "explanations")
+
+    def __init__(self, rows):
+        # rows: (id, верный ответ, очки, объяснение)
+        self.slots: Dict[int, int] = {}
+        letters, explanations = [], []
+        self.points = array("i")
+        self.offsets = array("q", [0])
+        size = 0
+        for slot, (question_id, correct_answer, points, explanation) in enumerate(rows):
+            self.slots[question_id] = slot
+            letters.append(correct_answer.upper())
+            self.points.append(points or 0)
+            data = (explanation or "").encode("utf-8")
+            explanations.append(data)
+            size += len(data)
+            self.offsets.append(size)
+        self.letters = tuple(letters)
+        self.explanations = b"".join(explanations)
+
+    def __contains__(self, question_id: int) -> bool:
+        return question_id in self.slots
+
+    def __len__(self):
+        return len(self.slots)
+
+    def question_points(self, question_id: int) -> int:
+        return self.points[self.slots[question_id]]
+
+    def grade(self, question_id: int, answer: Optional[str]) -> Optional[dict]:
+        """
+        Результат ответа на вопрос (answer=None — ответа нет);
+        None, если такого вопроса нет
+        """
+        slot = self.slots.get(question_id)
+        if slot is None:
+            return None
+        correct_answer = self.letters[slot]
+        is_correct = answer is not None and answer.upper() == correct_answer
+        return dict(
+            is_correct=is_correct,
+            correct_answer=correct_answer,
+            explanation=self.explanations[self.offsets[slot]:self.offsets[slot + 1]].decode("utf-8"),
+            points_earned=self.points[slot] if is_correct else 0
+        )
+
+
+def _load_rows():
+    if settings.data_mode == "memory":
+        return [(q.id, q.correct_answer, q.points, q.explanation) for q in get_store().questions]
+    with database.engine.connect() as conn:
+        return conn.execute(
+            select(
+                QuizQuestion.id, QuizQuestion.correct_answer,
+                QuizQuestion.points, QuizQuestion.explanation
+            ).order_by(QuizQuestion.id)
+        ).all()
+
+
+_key = DatasetCache(lambda: AnswerKey(_load_rows()))
+
+
+def get_answer_key() -> AnswerKey:
+    """Ключ ответов; строится после заполнения БД или при первом обращении"""
+    return _key.get()
+
+
+async def get_answer_key_async() -> AnswerKey:
+    """Ключ ответов для асинхронного обработчика (строится в пуле потоков)"""
+    return await _key.get_async()
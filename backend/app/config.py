@@ -5,6 +5,38 @@ class Settings(BaseSettings):
     app_name: str = "История реки Енисей"
     app_version: str = "1.0.0"
     database_url: str = "sqlite:///./yenisei.db"
+    
+    # Профиль соединений SQLite: "tuned" — настройки ниже, "default" — как есть у SQLite
+    sqlite_profile: str = "tuned"
+    sqlite_journal_mode: str = "wal"  # WAL: чтение не блокируется записью
+    sqlite_synchronous: str = "normal"  # С WAL данные не теряются и без fsync на каждый коммит
+    sqlite_cache_size: int = -32000  # Кэш страниц: отрицательное значение — в КиБ (32 МБ)
+    sqlite_mmap_size: int = 268435456  # Чтение файла через mmap (256 МБ)
+    sqlite_temp_store: str = "memory"  # Временные таблицы и сортировки в памяти
+    sqlite_readonly: bool = False  # Открыть БД только на чтение (mode=ro)
+    sqlite_immutable: bool = False  # Файл никогда не меняется: без блокировок (immutable=1)
+    db_pool_size: int = 5  # Постоянных соединений в пуле (0 — новое соединение на каждый запрос)
+    db_max_overflow: int = 10  # Дополнительных соединений сверх пула при пиковой нагрузке
+    threadpool_size: int = 40  # Потоков для синхронной работы (обработчики, запросы к БД)
+    
+    dataset_check_interval: float = 2.0  # Раз в сколько секунд проверять, не пересоздал ли БД другой процесс (0 — не проверять)
+    seed_extra_events: int = 0  # Синтетические события для нагрузочного стенда
+    snapshot_path: str = "./snapshot/yenisei.db"  # Готовый снимок БД (python seed_data.py --snapshot)
+    snapshot_mode: str = "copy"  # "copy" — скопировать в database_url, "readonly" — открыть только на чтение
+    data_mode: str = "sql"  # "sql" — запросы к БД, "memory" — ответы из набора данных в памяти
+    http_cache_max_age: int = 0  # Сколько секунд браузер и CDN отдают ответ без проверки ETag
+    response_cache_max_entries: int = 1024  # Ответов в кэше процесса (0 — кэш выключен)
+    response_cache_max_bytes: int = 33554432  # Суммарный объём тел ответов в кэше (32 МБ)
+    max_page_size: int = 500  # Предел limit для постраничных списков
+    compression_min_size: int = 500  # Ответы короче (в байтах) отдаются без сжатия
+    map_cluster_radius: int = 60  # Размер ячейки кластеров карты, пикселей
+    map_cluster_max_zoom: int = 16  # Выше этого масштаба точки не объединяются
+    timeline_top_k: int = 5  # Сколько самых важных событий на отрезок ленты времени можно запросить
+    timeline_max_buckets: int = 500  # Предел числа отрезков ленты времени в одном запросе
+    quiz_session_ttl: int = 3600  # Сколько секунд сессия викторины ждёт проверки ответов
+    quiz_session_max: int = 10000  # Открытых сессий викторины в памяти (старые вытесняются)
+    leaderboard_database_url: str = "sqlite:///./leaderboard.db"  # Отдельная БД: рабочая пересоздаётся при заполнении
+    leaderboard_flush_interval: float = 5.0  # Раз в сколько секунд новые очки пишутся в БД
     cors_origins: list = [
         "http://localhost:5173", 
         "http://localhost:3000",
@@ -1,15 +1,70 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
 from app.config import get_settings
+from app.snapshot import readonly_url, sqlite_path
 
 settings = get_settings()
 
-# Создаем движок базы данных
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False}  # Необходимо для SQLite
-)
+def database_url() -> str:
+    """URL рабочей БД с учётом снимка и режимов только для чтения"""
+    snapshot_url = readonly_url(settings)
+    if snapshot_url:
+        return snapshot_url
+    
+    path = sqlite_path(settings.database_url)
+    if path is not None and (settings.sqlite_readonly or settings.sqlite_immutable):
+        options = "mode=ro&immutable=1" if settings.sqlite_immutable else "mode=ro"
+        return f"sqlite:///file:{path.resolve().as_posix()}?{options}&uri=true"
+    return settings.database_url
+
+def sqlite_pragmas(readonly: bool = False) -> dict:
+    """PRAGMA, которые профиль "tuned" выполняет на каждом новом соединении"""
+    pragmas = {
+        "cache_size": settings.sqlite_cache_size,
+        "mmap_size": settings.sqlite_mmap_size,
+        "temp_store": settings.sqlite_temp_store,
+    }
+    if not readonly:
+        # Режим журнала хранится в самом файле — у БД только для чтения его не поменять
+        pragmas["journal_mode"] = settings.sqlite_journal_mode
+        pragmas["synchronous"] = settings.sqlite_synchronous
+    return pragmas
+
+def make_engine(url: str, profile: str = None, pool_size: int = None):
+    """
+    Создать движок базы данных с настройками приложения
+    - profile: профиль SQLite ("tuned" или "default"), по умолчанию из настроек
+    - pool_size: размер пула соединений, по умолчанию из настроек
+    """
+    pool_size = settings.db_pool_size if pool_size is None else pool_size
+    options = {"connect_args": {"check_same_thread": False}}  # Необходимо для SQLite
+    if pool_size > 0 and sqlite_path(url) is not None:
+        # Для файлов SQLite SQLAlchemy по умолчанию открывает соединение на каждый запрос.
+        # БД в памяти так не пулим: каждое новое соединение открыло бы свою пустую БД
+        options.update(
+            poolclass=QueuePool,
+            pool_size=pool_size,
+            max_overflow=settings.db_max_overflow,
+        )
+    new_engine = create_engine(url, **options)
+    
+    if new_engine.dialect.name == "sqlite" and (profile or settings.sqlite_profile) == "tuned":
+        pragmas = sqlite_pragmas(readonly="mode=ro" in url)
+        
+        @event.listens_for(new_engine, "connect")
+        def apply_sqlite_profile(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+    
+    return new_engine
+
+# Создаем движок базы данных (в режиме readonly — поверх готового снимка)
+engine = make_engine(database_url())
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -17,10 +72,27 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Базовый класс для моделей
 Base = declarative_base()
 
+# Базовый класс для таблицы лидеров: она хранится в отдельной БД
+# (leaderboard_database_url), которую заполнение рабочей БД не затрагивает
+LeaderboardBase = declarative_base()
+
 # Dependency для получения сессии БД
 def get_db():
     db = SessionLocal()
     try:
         yield db
+    finally:
+        db.close()
+
+# Выполнить fn(db, *args) с сессией БД из асинхронного обработчика — в пуле
+# потоков, как обычные синхронные обработчики (размер пула — threadpool_size).
+# fn должна вернуть готовый результат: после неё сессия закрывается
+async def run_db(fn, *args):
+    return await run_in_threadpool(_run_with_session, fn, *args)
+
+def _run_with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
     finally:
         db.close()
\ No newline at end of file
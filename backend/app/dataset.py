@@ -0,0 +1,194 @@
+import threading
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Generic, NamedTuple, Optional, TypeVar
+from sqlalchemy import inspect, select, text
+from starlette.concurrency import run_in_threadpool
+from app import database
+from app.config import get_settings
+from app.models import DatasetVersion
+from app.snapshot import sqlite_path
+
+# Оповещение об изменении набора данных.
+# Всё, что строится из данных БД один раз (кэши, индексы в памяти), подписывается
+# здесь и сбрасывается после каждого заполнения базы.
+# Каждое изменение данных начинает новое поколение. Значение, построенное
+# по данным прежнего поколения (запрос прочитал их до заполнения, а сохраняет
+# после сброса), не сохраняется: иначе оно отдавалось бы до следующего заполнения
+
+settings = get_settings()
+
+_listeners = []
+_generation = 0  # Номер поколения данных, растёт при каждом изменении
+_generation_lock = threading.RLock()
+_pinned: ContextVar[Optional[int]] = ContextVar("dataset_generation", default=None)
+
+T = TypeVar("T")
+
+
+def on_dataset_change(listener):
+    """Зарегистрировать функцию сброса производных от данных структур (можно как декоратор)"""
+    _listeners.append(listener)
+    return listener
+
+
+def dataset_changed():
+    """Сообщить подписчикам, что данные в БД изменились"""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        for listener in _listeners:
+            listener()
+
+
+def dataset_generation() -> int:
+    """
+    Поколение данных, которые читает текущий запрос (закреплено в его начале),
+    вне запроса — текущее
+    """
+    pinned = _pinned.get()
+    if pinned is not None:
+        return pinned
+    with _generation_lock:
+        return _generation
+
+
+def store_if_current(generation: int, store: Callable[[], None]) -> bool:
+    """
+    Сохранить построенное по данным значение (вызвать store()), только если
+    данные не менялись с поколения generation
+    """
+    with _generation_lock:
+        if generation != _generation:
+            return False
+        store()
+        return True
+
+
+async def pin_dataset_generation(request, call_next):
+    """Middleware: запрос читает данные одного поколения — закрепляем его номер"""
+    with _generation_lock:
+        token = _pinned.set(_generation)
+    try:
+        return await call_next(request)
+    finally:
+        _pinned.reset(token)
+
+
+class DatasetCache(Generic[T]):
+    """
+    Значение, которое строится из данных один раз (при первом обращении)
+    и сбрасывается при их изменении
+    """
+
+    __slots__ = ("_build", "_value", "_lock")
+
+    def __init__(self, build: Callable[[], T]):
+        self._build = build
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+        on_dataset_change(self.reset)
+
+    def get(self) -> T:
+        value = self._value
+        if value is None:
+            with self._lock:
+                value = self._value
+                if value is None:
+                    generation = dataset_generation()
+                    value = self._build()
+                    store_if_current(generation, lambda: setattr(self, "_value", value))
+        return value
+
+    async def get_async(self) -> T:
+        """get() для асинхронных обработчиков: построение — в пуле потоков, а не в цикле событий"""
+        value = self._value
+        if value is None:
+            value = await run_in_threadpool(self.get)
+        return value
+
+    def reset(self):
+        self._value = None
+
+
+class DatasetInfo(NamedTuple):
+    content_hash: str  # Хэш набора данных (seed_data.dataset_hash)
+    seeded_at: datetime  # Когда данные были загружены (UTC)
+
+
+def _read_version() -> Optional[DatasetInfo]:
+    engine = database.engine
+    if not inspect(engine).has_table(DatasetVersion.__tablename__):
+        return None
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(DatasetVersion.content_hash, DatasetVersion.seeded_at)
+            .order_by(DatasetVersion.id.desc()).limit(1)
+        ).first()
+    return DatasetInfo(*row) if row else None
+
+
+_version = DatasetCache(_read_version)
+
+
+def dataset_version() -> Optional[DatasetInfo]:
+    """Версия данных в рабочей БД (None, если БД не заполнена); читается из БД один раз"""
+    return _version.get()
+
+
+# Слежение за БД из других процессов.
+# Несколько воркеров работают с одним файлом БД, а пересоздание выполняет один из
+# них: остальные узнают о новых данных по PRAGMA data_version — на постоянном
+# соединении она меняется, когда БД изменило другое соединение. Тогда версия
+# данных перечитывается и сравнивается с версией, которую поток прочитал сам
+# (при старте или при прошлом изменении), а не с кэшем dataset_version(): кэш
+# заполняется только первым запросом и мог бы прочитать уже новые данные.
+# Пересоздание в своём процессе тоже попадает сюда и сбрасывает кэши ещё раз
+
+_stop = threading.Event()
+_watcher = None
+
+
+def _watch(interval: float):
+    engine = database.make_engine(database.database_url(), pool_size=1)
+    try:
+        with engine.connect() as conn:
+            last = conn.execute(text("PRAGMA data_version")).scalar()
+            known = _read_version()
+            while not _stop.wait(interval):
+                current = conn.execute(text("PRAGMA data_version")).scalar()
+                if current == last:
+                    continue
+                last = current
+                version = _read_version()
+                if version != known:
+                    known = version
+                    print("🔄 Данные в БД изменились — сбрасываем данные в памяти")
+                    dataset_changed()
+    except Exception as e:
+        print(f"❌ Ошибка слежения за БД: {e}")
+    finally:
+        engine.dispose()
+
+
+def watch_dataset():
+    """Следить за изменением данных в БД другими процессами (только файл SQLite)"""
+    global _watcher
+    if (
+        _watcher is None and settings.dataset_check_interval > 0
+        and sqlite_path(settings.database_url) is not None
+    ):
+        _stop.clear()
+        _watcher = threading.Thread(
+            target=_watch, args=(settings.dataset_check_interval,), name="dataset-watch", daemon=True
+        )
+        _watcher.start()
+
+
+def stop_watching():
+    """Остановить слежение за БД"""
+    global _watcher
+    if _watcher is not None:
+        _stop.set()
+        _watcher.join()
+        _watcher = None
@@ -0,0 +1,75 @@
+import json
+from typing import Dict, Iterable, List, Tuple
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from app.dataset import dataset_generation, on_dataset_change, store_if_current
+
+# Заранее сериализованный JSON записей.
+# Каждая запись проверяется pydantic-схемой и кодируется в JSON один раз
+# за версию данных; ответ-список склеивается из готовых байтовых фрагментов.
+# Кодирование повторяет JSONResponse FastAPI, поэтому ответ совпадает
+# с обычным response_model байт в байт
+
+_fragments: Dict[Tuple[type, int], bytes] = {}
+
+
+@on_dataset_change
+def _reset_fragments():
+    _fragments.clear()
+
+
+def encode_json(content) -> bytes:
+    """JSON так же, как его кодирует JSONResponse"""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def render(schema, record) -> bytes:
+    """JSON записи по схеме ответа (из кэша фрагментов, если уже кодировалась)"""
+    return render_all(schema, (record,))[0]
+
+
+def render_all(schema, records: Iterable) -> List[bytes]:
+    """
+    JSON записей по схеме ответа. Новые фрагменты сохраняются, только если
+    данные не сменились с начала запроса: иначе записи могли быть прочитаны
+    из прежних данных
+    """
+    generation = dataset_generation()
+    fragments, fresh = [], {}
+    for record in records:
+        key = (schema, record.id)
+        fragment = _fragments.get(key)
+        if fragment is None:
+            fragment = fresh[key] = encode_json(jsonable_encoder(schema.from_orm(record)))
+        fragments.append(fragment)
+    if fresh:
+        store_if_current(generation, lambda: _fragments.update(fresh))
+    return fragments
+
+
+async def render_all_async(schema, records: Iterable) -> List[bytes]:
+    """
+    render_all() из асинхронного обработчика: если фрагменты ещё не кодировались
+    (первый запрос после заполнения БД), кодирование идёт в пуле потоков
+    """
+    records = list(records)
+    if all((schema, record.id) in _fragments for record in records):
+        return render_all(schema, records)
+    return await run_in_threadpool(render_all, schema, records)
+
+
+def _list_body(fragments: List[bytes]) -> Response:
+    return Response(content=b"[" + b",".join(fragments) + b"]", media_type="application/json")
+
+
+def list_response(schema, records: Iterable) -> Response:
+    """Ответ со списком записей, собранный из готовых фрагментов"""
+    return _list_body(render_all(schema, records))
+
+
+async def list_response_async(schema, records: Iterable) -> Response:
+    """list_response() из асинхронного обработчика (см. render_all_async)"""
+    return _list_body(await render_all_async(schema, records))
@@ -0,0 +1,183 @@
+import gzip
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from app.config import get_settings
+from app.dataset import DatasetInfo, dataset_version
+
+try:
+    import brotli
+except ImportError:  # Без пакета brotli ответы сжимаются только gzip
+    brotli = None
+
+# Условные GET-запросы для контента API.
+# Данные меняются только при заполнении БД, поэтому ETag ответа определяется
+# версией набора данных и параметрами запроса. Совпавший If-None-Match получает
+# 304 прямо в middleware — без обращения к БД и сериализации ответа; If-Modified-Since
+# проверяется уже после ответа 200.
+# Сжатые варианты ответа (br, gzip) получают свой ETag с суффиксом кодировки
+
+settings = get_settings()
+
+# Ответы, которые меняются от запроса к запросу (случайная выборка, очки игроков, служебные)
+UNCACHEABLE_PATHS = (
+    "/api/reseed",
+    "/api/cache",
+    "/api/quiz/questions/random",
+    "/api/facts/random",
+    "/api/quiz/leaderboard",
+)
+
+
+# Кодировки в порядке предпочтения
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+_ENCODING_SUFFIXES = ("-br\"", "-gzip\"")
+
+
+def is_cacheable(request: Request) -> bool:
+    """Можно ли кэшировать ответ на запрос по версии данных"""
+    path = request.url.path
+    return (
+        request.method == "GET"
+        and path.startswith("/api/")
+        and not path.startswith(UNCACHEABLE_PATHS)
+    )
+
+
+def request_key(request: Request) -> str:
+    """Путь и отсортированные параметры: одинаковые запросы дают одинаковый ключ"""
+    # Значения кодируются заново: иначе "a=1%26b%3D2" и "a=1&b=2" дали бы один ключ
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+def request_etag(request: Request, version: DatasetInfo) -> str:
+    """Сильный ETag: версия приложения, версия данных, путь и параметры запроса"""
+    key = f"{settings.app_version}\n{version.content_hash}\n{request_key(request)}"
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """Лучшая кодировка из Accept-Encoding, которую умеем отдавать (None — без сжатия)"""
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, fast: bool = False) -> bytes:
+    """
+    Сжать тело ответа с максимальной степенью (делается один раз на версию данных).
+    fast — быстрое сжатие для ответов, которые не попадают в кэш и сжимаются
+    на каждый запрос: максимальная степень brotli в десятки раз медленнее
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=5 if fast else 11)
+    return gzip.compress(body, compresslevel=6 if fast else 9, mtime=0)
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag сжатого варианта: к тегу добавляется суффикс кодировки ("abc" -> "abc-gzip")"""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def _base_etag(tag: str) -> str:
+    tag = tag.strip().removeprefix("W/")
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def _matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    Тег из If-None-Match, совпавший с ETag ответа (слабое сравнение, как требует
+    RFC 9110); любой вариант сжатия того же ответа считается совпадением
+    """
+    if if_none_match.strip() == "*":
+        return etag
+    for tag in if_none_match.split(","):
+        if _base_etag(tag) == etag:
+            return tag.strip()
+    return None
+
+
+def _not_modified_since(if_modified_since: str, version: DatasetInfo) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return _last_modified(version).replace(microsecond=0) <= since
+
+
+def _last_modified(version: DatasetInfo):
+    return version.seeded_at.replace(tzinfo=timezone.utc)
+
+
+def cache_headers(etag: str, version: DatasetInfo) -> dict:
+    """Заголовки валидации кэша для ответа"""
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(_last_modified(version), usegmt=True),
+        "Cache-Control": f"public, max-age={settings.http_cache_max_age}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def not_modified(request: Request, etag: str, version: DatasetInfo) -> Optional[Response]:
+    """
+    Ответ 304 по If-None-Match, если у клиента уже есть актуальная версия.
+    Проверяется до маршрутизации: совпавший ETag клиент мог получить только с ответом 200
+    """
+    if_none_match = request.headers.get("if-none-match")
+    matched = _matching_etag(if_none_match, etag) if if_none_match is not None else None
+    if matched is None:
+        return None
+    return Response(status_code=304, headers=cache_headers(matched, version))
+
+
+def modified_since(request: Request, version: DatasetInfo) -> bool:
+    """
+    Нужен ли полный ответ по If-Modified-Since. Дата изменения общая для всех путей,
+    поэтому проверяется только после ответа 200 — иначе 304 получил бы и несуществующий путь.
+    If-Modified-Since не учитывается, если есть If-None-Match (RFC 9110)
+    """
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "if-none-match" in request.headers:
+        return True
+    return not _not_modified_since(if_modified_since, version)
+
+
+async def conditional_get(request: Request, call_next):
+    """Middleware: ETag/Last-Modified для контента и 304 на условные запросы"""
+    version = dataset_version() if is_cacheable(request) else None
+    if version is None:
+        return await call_next(request)
+
+    etag = request_etag(request, version)
+    response = not_modified(request, etag, version)
+    if response is not None:
+        return response
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        headers = cache_headers(variant_etag(etag, response.headers.get("content-encoding")), version)
+        if not modified_since(request, version):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+    return response
@@ -0,0 +1,284 @@
+import random
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import database
+from app.config import get_settings
+from app.database import LeaderboardBase
+from app.models import LeaderboardScore
+
+# Таблица лидеров викторины.
+# Рейтинг хранится в памяти в индексируемом списке с пропусками (skip list):
+# обновление очков, место игрока и страница рейтинга — O(log n).
+# Запись в SQLite отложенная: изменённые игроки копятся в памяти и раз
+# в leaderboard_flush_interval секунд пишутся одной транзакцией (и при остановке
+# приложения), поэтому ответы викторины не ждут единственного писателя SQLite.
+# При аварийном завершении теряются очки не больше чем за один интервал.
+# Данные лежат в отдельной БД leaderboard_database_url и переживают перезапуск
+# и пересоздание рабочей БД
+
+settings = get_settings()
+
+
+class _Top:
+    """Ключ концевого узла: больше любого ключа"""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * levels
+        self.width = [1] * levels  # Сколько элементов пропускает ссылка next[level]
+
+
+class IndexableSkipList:
+    """
+    Упорядоченный набор ключей с доступом по номеру: вставка, удаление,
+    номер ключа и элемент по номеру — O(log n) в среднем
+    """
+
+    MAX_LEVELS = 24  # Достаточно для ~16 млн элементов
+
+    def __init__(self):
+        self._end = _Node(_Top(), 0)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._head.next = [self._end] * self.MAX_LEVELS
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _random_levels(self) -> int:
+        levels = 1
+        while levels < self.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        return levels
+
+    def _path(self, key):
+        """Последние узлы перед key на каждом уровне и позиции этих узлов"""
+        chain = [self._head] * self.MAX_LEVELS
+        positions = [0] * self.MAX_LEVELS  # Позиция узла: голова — 0, первый элемент — 1
+        node, position = self._head, 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key):
+        chain, positions = self._path(key)
+        levels = self._random_levels()
+        node = _Node(key, levels)
+        position = positions[0] + 1  # Позиция нового узла
+        for level in range(levels):
+            prev = chain[level]
+            node.next[level] = prev.next[level]
+            prev.next[level] = node
+            node.width[level] = prev.width[level] - (position - 1 - positions[level])
+            prev.width[level] = position - positions[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._path(key)
+        node = chain[0].next[0]
+        if node.key != key:
+            raise KeyError(key)
+        for level in range(len(node.next)):
+            prev = chain[level]
+            prev.width[level] += node.width[level] - 1
+            prev.next[level] = node.next[level]
+        for level in range(len(node.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def index(self, key) -> int:
+        """Номер ключа (с 0)"""
+        chain, positions = self._path(key)
+        if chain[0].next[0].key != key:
+            raise KeyError(key)
+        return positions[0]
+
+    def slice(self, start: int, count: int) -> List:
+        """До count ключей начиная с номера start"""
+        if start < 0 or start >= self.size or count <= 0:
+            return []
+        node, remaining = self._head, start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining and node.next[level] is not self._end:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not self._end and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class PlayerScore(NamedTuple):
+    player: str
+    points: int  # Сумма очков за все викторины
+    quizzes: int  # Сколько викторин пройдено
+    updated_at: datetime  # Когда очки последний раз изменились
+
+
+def _rank_key(score: PlayerScore):
+    """Порядок рейтинга: больше очков выше, при равенстве — кто набрал их раньше"""
+    return (-score.points, score.updated_at, score.player)
+
+
+class Leaderboard:
+    """Рейтинг игроков в памяти и список игроков, ещё не записанных в БД"""
+
+    def __init__(self, scores: Iterable[PlayerScore] = ()):
+        self._ranking = IndexableSkipList()
+        self._players: Dict[str, PlayerScore] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        for score in scores:
+            self._players[score.player] = score
+            self._ranking.insert(_rank_key(score))
+
+    def __len__(self):
+        return len(self._players)
+
+    def add(self, player: str, points: int) -> Tuple[int, PlayerScore]:
+        """Засчитать пройденную викторину; вернуть (место, новые очки игрока)"""
+        with self._lock:
+            previous = self._players.get(player)
+            if previous is not None:
+                self._ranking.remove(_rank_key(previous))
+            score = PlayerScore(
+                player,
+                (previous.points if previous else 0) + points,
+                (previous.quizzes if previous else 0) + 1,
+                datetime.utcnow(),
+            )
+            self._players[player] = score
+            self._ranking.insert(_rank_key(score))
+            self._dirty.add(player)
+            return self._ranking.index(_rank_key(score)) + 1, score
+
+    def rank(self, player: str) -> Optional[Tuple[int, PlayerScore]]:
+        """Место и очки игрока (None, если игрока нет)"""
+        with self._lock:
+            score = self._players.get(player)
+            if score is None:
+                return None
+            return self._ranking.index(_rank_key(score)) + 1, score
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, PlayerScore]]:
+        """Страница рейтинга: пары (место, очки игрока)"""
+        with self._lock:
+            keys = self._ranking.slice(offset, limit)
+            return [
+                (offset + i + 1, self._players[player])
+                for i, (_, _, player) in enumerate(keys)
+            ]
+
+    def take_dirty(self) -> List[PlayerScore]:
+        """Забрать очки игроков, изменившиеся после прошлой записи"""
+        with self._lock:
+            scores = [self._players[player] for player in self._dirty]
+            self._dirty.clear()
+            return scores
+
+    def mark_dirty(self, players: Iterable[str]):
+        """Вернуть игроков в очередь на запись (запись не удалась)"""
+        with self._lock:
+            self._dirty.update(players)
+
+
+_engine = None
+_leaderboard = None
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_stop = threading.Event()
+_flusher = None
+
+
+def get_leaderboard() -> Leaderboard:
+    """Таблица лидеров; при первом обращении читается из своей БД"""
+    global _engine, _leaderboard
+    leaderboard = _leaderboard
+    if leaderboard is None:
+        with _lock:
+            if _leaderboard is None:
+                _engine = database.make_engine(settings.leaderboard_database_url, pool_size=1)
+                LeaderboardBase.metadata.create_all(_engine)
+                with _engine.connect() as conn:
+                    rows = conn.execute(select(
+                        LeaderboardScore.player, LeaderboardScore.points,
+                        LeaderboardScore.quizzes, LeaderboardScore.updated_at
+                    )).all()
+                _leaderboard = Leaderboard(PlayerScore(*row) for row in rows)
+            leaderboard = _leaderboard
+    return leaderboard
+
+
+def flush() -> int:
+    """Записать изменившиеся очки одной транзакцией; вернуть число игроков"""
+    if _leaderboard is None:
+        return 0
+    with _flush_lock:
+        scores = _leaderboard.take_dirty()
+        if not scores:
+            return 0
+        statement = sqlite_insert(LeaderboardScore)
+        statement = statement.on_conflict_do_update(
+            index_elements=[LeaderboardScore.player],
+            set_={
+                "points": statement.excluded.points,
+                "quizzes": statement.excluded.quizzes,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+        try:
+            with _engine.begin() as conn:
+                conn.execute(statement, [score._asdict() for score in scores])
+        except Exception:
+            _leaderboard.mark_dirty(score.player for score in scores)
+            raise
+        return len(scores)
+
+
+def _flush_periodically():
+    while not _stop.wait(settings.leaderboard_flush_interval):
+        try:
+            flush()
+        except Exception as e:
+            print(f"❌ Ошибка записи таблицы лидеров: {e}")
+
+
+def start_flusher():
+    """Запустить фоновую запись очков"""
+    global _flusher
+    if _flusher is None:
+        _stop.clear()
+        _flusher = threading.Thread(target=_flush_periodically, name="leaderboard-flush", daemon=True)
+        _flusher.start()
+
+
+def stop_flusher():
+    """Остановить фоновую запись и записать оставшиеся очки"""
+    global _flusher
+    if _flusher is not None:
+        _stop.set()
+        _flusher.join()
+        _flusher = None
+    flush()
+    if _engine is not None:
+        _engine.dispose()
@@ -0,0 +1,214 @@
+import math
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import select
+from app import database
+from app.config import get_settings
+from app.dataset import DatasetCache
+from app.fragments import encode_json
+from app.memory_store import get_store
+from app.models import GeographicPoint
+from app.spatial import bbox_ranges
+
+# Кластеры маркеров карты по уровням масштаба.
+# Точки переводятся в координаты Web Mercator (как у тайлов карты), и на каждом
+# уровне z кластеры уровня z + 1 объединяются по сетке с ячейкой
+# map_cluster_radius пикселей. Поэтому кластеры вложены друг в друга, а в любом
+# окне карты их не больше, чем ячеек сетки в нём, сколько бы ни было точек.
+# Уровни строятся один раз после заполнения БД (для всех точек и для каждого
+# типа), JSON каждого кластера собирается заранее
+
+settings = get_settings()
+
+TILE_SIZE = 256  # Пикселей в тайле карты
+MAX_LATITUDE = 85.05112878  # Граница проекции Web Mercator
+
+
+class Cluster(NamedTuple):
+    latitude: float
+    longitude: float
+    count: int  # Точек в кластере
+    type: Optional[str]  # Самый частый тип точек
+    color: Optional[str]  # Самый частый цвет маркеров
+    point_id: Optional[int]  # id точки, если кластер из одной точки
+    expansion_zoom: Optional[int]  # Уровень, на котором кластер распадается
+    fragment: bytes  # Готовый JSON кластера
+
+
+class _Node:
+    """Кластер во время построения: центр в координатах Mercator и счётчики"""
+
+    __slots__ = ("x", "y", "count", "types", "colors", "point_id", "expansion_zoom", "cluster")
+
+    def __init__(self, x, y, count, types, colors, point_id=None, expansion_zoom=None):
+        self.x, self.y, self.count = x, y, count
+        self.types, self.colors = types, colors
+        self.point_id, self.expansion_zoom = point_id, expansion_zoom
+        self.cluster = None  # Готовый Cluster: узел без изменений переходит на уровни ниже
+
+    def to_cluster(self) -> "Cluster":
+        if self.cluster is None:
+            latitude, longitude = from_mercator(self.x, self.y)
+            fields = dict(
+                latitude=round(latitude, 6),
+                longitude=round(longitude, 6),
+                count=self.count,
+                type=_dominant(self.types),
+                color=_dominant(self.colors),
+                point_id=self.point_id,
+                expansion_zoom=self.expansion_zoom,
+            )
+            self.cluster = Cluster(**fields, fragment=encode_json(fields))
+        return self.cluster
+
+
+def to_mercator(latitude: float, longitude: float):
+    """Координаты Web Mercator, доли мира от 0 до 1"""
+    sin = math.sin(math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))))
+    return (longitude + 180) / 360, 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+
+
+def from_mercator(x: float, y: float):
+    """Широта и долгота по координатам Web Mercator"""
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return latitude, x * 360 - 180
+
+
+def _dominant(counts: Dict[Optional[str], int]) -> Optional[str]:
+    """Самое частое значение; при равенстве — первое по алфавиту"""
+    return min(counts.items(), key=lambda item: (-item[1], item[0] or ""))[0]
+
+
+def _merge(nodes: List[_Node], zoom: int) -> _Node:
+    if len(nodes) == 1:
+        return nodes[0]
+    count = sum(node.count for node in nodes)
+    types, colors = {}, {}
+    for node in nodes:
+        for value, n in node.types.items():
+            types[value] = types.get(value, 0) + n
+        for value, n in node.colors.items():
+            colors[value] = colors.get(value, 0) + n
+    return _Node(
+        sum(node.x * node.count for node in nodes) / count,
+        sum(node.y * node.count for node in nodes) / count,
+        count, types, colors, expansion_zoom=zoom + 1,
+    )
+
+
+class ClusterLevel:
+    """
+    Кластеры одного уровня масштаба по ячейкам его сетки.
+    Центр кластера лежит в той же ячейке, что и объединённые в нём точки,
+    поэтому для окна карты достаточно перебрать ячейки, которые оно покрывает
+    """
+
+    __slots__ = ("cell", "clusters", "cells")
+
+    def __init__(self, nodes: List[_Node], cell: float):
+        self.cell = cell
+        self.clusters = [node.to_cluster() for node in nodes]
+        self.cells: Dict[tuple, List[int]] = {}
+        for i, node in enumerate(nodes):
+            self.cells.setdefault((int(node.x // cell), int(node.y // cell)), []).append(i)
+
+    def bbox(self, south: float, west: float, north: float, east: float) -> List[Cluster]:
+        found = set()
+        for (low_lat, low_lon), (high_lat, high_lon) in bbox_ranges(south, west, north, east):
+            x0, y0 = to_mercator(high_lat, low_lon)
+            x1, y1 = to_mercator(low_lat, high_lon)
+            columns = range(int(x0 // self.cell), int(x1 // self.cell) + 1)
+            rows = range(int(y0 // self.cell), int(y1 // self.cell) + 1)
+            if len(columns) * len(rows) > len(self.clusters):
+                # Окно крупнее сетки уровня — дешевле проверить все кластеры
+                candidates = range(len(self.clusters))
+            else:
+                candidates = [
+                    i for column in columns for row in rows
+                    for i in self.cells.get((column, row), ())
+                ]
+            for i in candidates:
+                cluster = self.clusters[i]
+                if low_lat <= cluster.latitude <= high_lat and low_lon <= cluster.longitude <= high_lon:
+                    found.add(i)
+        return [self.clusters[i] for i in sorted(found)]
+
+
+def build_levels(points, max_zoom: int, radius: int) -> List[ClusterLevel]:
+    """
+    Уровни 0..max_zoom + 1 для точек (id, тип, цвет, широта, долгота);
+    на последнем уровне каждая точка — отдельный кластер
+    """
+    nodes = []
+    for point_id, point_type, color, latitude, longitude in points:
+        x, y = to_mercator(latitude, longitude)
+        nodes.append(_Node(x, y, 1, {point_type: 1}, {color: 1}, point_id=point_id))
+
+    levels = [ClusterLevel(nodes, _cell_size(max_zoom + 1, radius))]
+    for zoom in range(max_zoom, -1, -1):
+        cell = _cell_size(zoom, radius)
+        grid: Dict[tuple, List[_Node]] = {}
+        for node in nodes:
+            grid.setdefault((int(node.x // cell), int(node.y // cell)), []).append(node)
+        merged = [_merge(cell_nodes, zoom) for cell_nodes in grid.values()]
+        # Если на уровне ничего не объединилось, он совпадает со следующим
+        level = levels[-1] if len(merged) == len(nodes) else ClusterLevel(merged, cell)
+        levels.append(level)
+        nodes = merged
+    levels.reverse()
+    return levels
+
+
+def _cell_size(zoom: int, radius: int) -> float:
+    """Ячейка сетки уровня zoom в долях мира"""
+    return radius / (TILE_SIZE * 2 ** zoom)
+
+
+class MapClusters:
+    """Уровни кластеров по типу точки (ключ None — все точки)"""
+
+    __slots__ = ("max_zoom", "levels")
+
+    def __init__(self, rows, max_zoom: int, radius: int):
+        self.max_zoom = max_zoom
+        groups: Dict[Optional[str], list] = {}
+        for row in rows:
+            for key in {None, row[1]}:
+                groups.setdefault(key, []).append(row)
+        self.levels: Dict[Optional[str], List[ClusterLevel]] = {
+            key: build_levels(points, max_zoom, radius) for key, points in groups.items()
+        }
+
+    def bbox(self, zoom: int, south: float, west: float, north: float, east: float,
+             point_type: Optional[str] = None) -> List[Cluster]:
+        """Кластеры уровня zoom с центром в прямоугольнике (выше max_zoom — отдельные точки)"""
+        levels = self.levels.get(point_type or None)
+        if levels is None:
+            return []
+        return levels[max(0, min(zoom, self.max_zoom + 1))].bbox(south, west, north, east)
+
+
+def _load_rows():
+    if settings.data_mode == "memory":
+        return [(p.id, p.type, p.color, p.latitude, p.longitude) for p in get_store().points]
+    with database.engine.connect() as conn:
+        return conn.execute(
+            select(
+                GeographicPoint.id, GeographicPoint.type, GeographicPoint.color,
+                GeographicPoint.latitude, GeographicPoint.longitude
+            ).order_by(GeographicPoint.id)
+        ).all()
+
+
+_clusters = DatasetCache(
+    lambda: MapClusters(_load_rows(), settings.map_cluster_max_zoom, settings.map_cluster_radius)
+)
+
+
+def get_map_clusters() -> MapClusters:
+    """Кластеры карты; строятся после заполнения БД или при первом обращении"""
+    return _clusters.get()
+
+
+async def get_map_clusters_async() -> MapClusters:
+    """Кластеры карты для асинхронного обработчика; построение — в пуле потоков"""
+    return await _clusters.get_async()
@@ -0,0 +1,206 @@
+from typing import NamedTuple, Optional, Tuple
+from sqlalchemy import select
+from app import database
+from app.dataset import DatasetCache
+from app.models import (
+    Epoch, HistoricalEvent, GeographicPoint,
+    GalleryImage, QuizQuestion, InterestingFact
+)
+
+# Неизменяемые записи для режима data_mode="memory".
+# Поля совпадают с колонками моделей, поэтому pydantic-схемы с orm_mode
+# читают их так же, как объекты ORM
+
+
+class EventRecord(NamedTuple):
+    id: int
+    epoch_id: int
+    title: str
+    year: Optional[int]
+    date_description: Optional[str]
+    description: str
+    short_description: Optional[str]
+    image_url: Optional[str]
+    image_caption: Optional[str]
+    importance: Optional[int]
+
+
+class EpochRecord(NamedTuple):
+    id: int
+    name: str
+    start_year: Optional[int]
+    end_year: Optional[int]
+    description: Optional[str]
+    color: Optional[str]
+    order_index: Optional[int]
+    events: Tuple[EventRecord, ...] = ()
+
+
+class PointRecord(NamedTuple):
+    id: int
+    name: str
+    type: Optional[str]
+    latitude: float
+    longitude: float
+    description: Optional[str]
+    short_description: Optional[str]
+    founding_year: Optional[int]
+    population: Optional[int]
+    image_url: Optional[str]
+    icon: Optional[str]
+    color: Optional[str]
+
+
+class GalleryRecord(NamedTuple):
+    id: int
+    title: str
+    description: Optional[str]
+    image_url: str
+    category: Optional[str]
+    photographer: Optional[str]
+    year_taken: Optional[int]
+    location: Optional[str]
+    order_index: Optional[int]
+    is_featured: Optional[bool]
+
+
+class QuestionRecord(NamedTuple):
+    id: int
+    question: str
+    option_a: str
+    option_b: str
+    option_c: str
+    option_d: str
+    correct_answer: str
+    explanation: Optional[str]
+    difficulty: Optional[str]
+    category: Optional[str]
+    points: Optional[int]
+
+
+class FactRecord(NamedTuple):
+    id: int
+    title: str
+    fact: str
+    category: Optional[str]
+    icon: Optional[str]
+    order_index: Optional[int]
+
+
+# SQLite LIKE не различает регистр только у латиницы — повторяем это поведение
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def like_contains(text: Optional[str], needle: str) -> bool:
+    """Аналог column.contains(needle) в SQLite для данных в памяти"""
+    return text is not None and needle.translate(_ASCII_LOWER) in text.translate(_ASCII_LOWER)
+
+
+def _load(conn, model, record):
+    """Прочитать таблицу целиком в кортеж записей (без ORM), по порядку id"""
+    table = model.__table__
+    columns = [table.c[name] for name in record._fields if name in table.c]
+    rows = conn.execute(select(*columns).order_by(table.c.id))
+    return tuple(record(*row) for row in rows)
+
+
+def _nulls_first(value):
+    """Ключ сортировки, как у SQLite: NULL раньше любых значений"""
+    return (value is not None, value if value is not None else 0)
+
+
+def event_order_key(year, event_id):
+    """Порядок ленты событий: по году (NULL раньше), затем по id"""
+    return (_nulls_first(year), event_id)
+
+
+def event_order(event):
+    return event_order_key(event.year, event.id)
+
+
+def _group(records, key):
+    """Сгруппировать записи по полю, сохраняя их порядок"""
+    groups = {}
+    for record in records:
+        groups.setdefault(getattr(record, key), []).append(record)
+    return {value: tuple(items) for value, items in groups.items()}
+
+
+class MemoryStore:
+    """Весь набор данных в памяти с заранее построенными индексами"""
+    __slots__ = (
+        "epochs", "epochs_by_id",
+        "events", "events_by_id", "events_by_epoch", "events_by_importance",
+        "event_keys", "event_keys_by_epoch",
+        "points", "points_by_id", "points_by_type",
+        "point_ids", "point_ids_by_type", "major_cities",
+        "gallery", "gallery_by_id", "gallery_by_category",
+        "questions", "questions_by_id", "quiz_categories",
+        "facts", "facts_by_category",
+    )
+
+    def __init__(self, conn):
+        events = _load(conn, HistoricalEvent, EventRecord)
+        self.events = tuple(sorted(events, key=event_order))
+        self.events_by_id = {e.id: e for e in events}
+        self.events_by_epoch = _group(self.events, "epoch_id")
+        # Ключи порядка ленты параллельно events и events_by_epoch:
+        # по ним курсор ищется двоичным поиском
+        self.event_keys = tuple(map(event_order, self.events))
+        self.event_keys_by_epoch = {
+            epoch_id: tuple(map(event_order, items)) for epoch_id, items in self.events_by_epoch.items()
+        }
+        self.events_by_importance = tuple(
+            sorted(events, key=lambda e: (-(e.importance or 0), e.id))
+        )
+
+        epochs = tuple(
+            epoch._replace(events=self.events_by_epoch.get(epoch.id, ()))
+            for epoch in _load(conn, Epoch, EpochRecord)
+        )
+        self.epochs = tuple(sorted(epochs, key=lambda e: (_nulls_first(e.order_index), e.id)))
+        self.epochs_by_id = {e.id: e for e in epochs}
+
+        self.points = _load(conn, GeographicPoint, PointRecord)
+        self.points_by_id = {p.id: p for p in self.points}
+        self.points_by_type = _group(self.points, "type")
+        # id параллельно points и points_by_type
+        self.point_ids = tuple(p.id for p in self.points)
+        self.point_ids_by_type = {
+            point_type: tuple(p.id for p in items) for point_type, items in self.points_by_type.items()
+        }
+        self.major_cities = tuple(sorted(
+            (p for p in self.points_by_type.get("city", ()) if p.population is not None),
+            key=lambda p: (-p.population, p.id)
+        ))[:10]
+
+        gallery = _load(conn, GalleryImage, GalleryRecord)
+        self.gallery = tuple(sorted(gallery, key=lambda g: (_nulls_first(g.order_index), g.id)))
+        self.gallery_by_id = {g.id: g for g in gallery}
+        self.gallery_by_category = _group(self.gallery, "category")
+
+        self.questions = _load(conn, QuizQuestion, QuestionRecord)
+        self.questions_by_id = {q.id: q for q in self.questions}
+        self.quiz_categories = tuple(sorted(_group(self.questions, "category"), key=_nulls_first))
+
+        facts = _load(conn, InterestingFact, FactRecord)
+        self.facts = tuple(sorted(facts, key=lambda f: (_nulls_first(f.order_index), f.id)))
+        self.facts_by_category = _group(self.facts, "category")
+
+
+def _load_store() -> MemoryStore:
+    with database.engine.connect() as conn:
+        return MemoryStore(conn)
+
+
+_store = DatasetCache(_load_store)
+
+
+def get_store() -> MemoryStore:
+    """Набор данных в памяти; загружается из БД при первом обращении"""
+    return _store.get()
+
+
+async def get_store_async() -> MemoryStore:
+    """Набор данных в памяти для асинхронного обработчика: загрузка из БД идёт в пуле потоков"""
+    return await _store.get_async()
@@ -0,0 +1,54 @@
+from sqlalchemy import inspect, text
+from app.database import Base
+from app.models import SCHEMA_VERSION
+from app.search import SEARCH_INDEXES, rebuild_search_index
+
+# Доведение схемы существующей БД до SCHEMA_VERSION без пересоздания данных.
+# Версия схемы хранится в PRAGMA user_version; все шаги идемпотентны,
+# поэтому на уже обновлённой БД миграция сводится к чтению одного числа
+
+
+def schema_version(conn) -> int:
+    """Версия схемы, записанная в БД (0 — не записана или не SQLite)"""
+    if conn.dialect.name != "sqlite":
+        return 0
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def mark_schema_version(conn):
+    """Записать в БД текущую версию схемы"""
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def migrate(bind) -> bool:
+    """
+    Создать недостающие таблицы, индексы и полнотекстовые индексы
+    Возвращает True, если схема была обновлена
+    """
+    with bind.connect() as conn:
+        if conn.dialect.name == "sqlite" and schema_version(conn) >= SCHEMA_VERSION:
+            return False
+
+        with conn.begin():
+            Base.metadata.create_all(conn)
+            # create_all создаёт индексы только вместе с новыми таблицами
+            existing = {
+                table: {index["name"] for index in inspect(conn).get_indexes(table)}
+                for table in Base.metadata.tables
+            }
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    if index.name not in existing[table.name]:
+                        index.create(conn)
+
+            if conn.dialect.name == "sqlite":
+                fts_tables = {index.fts_table for index in SEARCH_INDEXES.values()}
+                found = conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'table'")
+                ).scalars()
+                if not fts_tables <= set(found):
+                    rebuild_search_index(conn)
+
+            mark_schema_version(conn)
+    return True
@@ -1,11 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime, Boolean, Index, desc
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from app.database import Base
+from app.database import Base, LeaderboardBase
+
+# Версия схемы БД: увеличивается при изменении таблиц или индексов
+# (в том числе тех, что сидер строит сам, например полнотекстовых).
+# Существующие БД доводятся до неё в app/migrations.py
+SCHEMA_VERSION = 3
 
 # Модель для исторических эпох
 class Epoch(Base):
     __tablename__ = "epochs"
+    __table_args__ = (
+        Index("ix_epochs_order_index", "order_index"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)  # Например: "Палеолит", "Эпоха освоения"
@@ -15,8 +23,13 @@ class Epoch(Base):
     color = Column(String(20), default="#3B82F6")  # Цвет для визуализации
     order_index = Column(Integer, default=0)  # Порядок отображения
     
-    # Связи
-    events = relationship("HistoricalEvent", back_populates="epoch", cascade="all, delete-orphan")
+    # Связи (события эпохи — в хронологическом порядке)
+    events = relationship(
+        "HistoricalEvent",
+        back_populates="epoch",
+        cascade="all, delete-orphan",
+        order_by="[HistoricalEvent.year, HistoricalEvent.id]"
+    )
     
     def __repr__(self):
         return f"<Epoch {self.name}>"
@@ -25,6 +38,11 @@ class Epoch(Base):
 # Модель для исторических событий
 class HistoricalEvent(Base):
     __tablename__ = "historical_events"
+    __table_args__ = (
+        Index("ix_historical_events_epoch_id_year", "epoch_id", "year"),  # События эпохи по годам
+        Index("ix_historical_events_year", "year"),  # Лента событий по годам
+        Index("ix_historical_events_importance", desc("importance"), "id"),  # Самые важные события
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     epoch_id = Column(Integer, ForeignKey("epochs.id"), nullable=False)
@@ -48,6 +66,9 @@ class HistoricalEvent(Base):
 # Модель для географических точек на карте
 class GeographicPoint(Base):
     __tablename__ = "geographic_points"
+    __table_args__ = (
+        Index("ix_geographic_points_type_population", "type", "population"),  # Фильтр по типу, крупные города
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)  # Название точки (город, место)
@@ -69,6 +90,11 @@ class GeographicPoint(Base):
 # Модель для галереи изображений
 class GalleryImage(Base):
     __tablename__ = "gallery_images"
+    __table_args__ = (
+        Index("ix_gallery_images_order_index", "order_index"),
+        Index("ix_gallery_images_category_order_index", "category", "order_index"),
+        Index("ix_gallery_images_is_featured_order_index", "is_featured", "order_index"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -88,6 +114,10 @@ class GalleryImage(Base):
 # Модель для вопросов викторины
 class QuizQuestion(Base):
     __tablename__ = "quiz_questions"
+    __table_args__ = (
+        Index("ix_quiz_questions_difficulty_category", "difficulty", "category"),
+        Index("ix_quiz_questions_category", "category"),  # Фильтр по категории и список категорий
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     question = Column(Text, nullable=False)  # Текст вопроса
@@ -108,6 +138,10 @@ class QuizQuestion(Base):
 # Модель для интересных фактов
 class InterestingFact(Base):
     __tablename__ = "interesting_facts"
+    __table_args__ = (
+        Index("ix_interesting_facts_order_index", "order_index"),
+        Index("ix_interesting_facts_category_order_index", "category", "order_index"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -117,4 +151,29 @@ class InterestingFact(Base):
     order_index = Column(Integer, default=0)
     
     def __repr__(self):
-        return f"<InterestingFact {self.title}>"
\ No newline at end of file
+        return f"<InterestingFact {self.title}>"
+
+
+# Модель для версии загруженного набора данных
+class DatasetVersion(Base):
+    __tablename__ = "dataset_version"
+    
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 набора данных из seed_data.py
+    seeded_at = Column(DateTime, default=datetime.utcnow)  # Когда данные были загружены
+    
+    def __repr__(self):
+        return f"<DatasetVersion {self.content_hash[:12]}>"
+
+
+# Модель для очков игроков викторины (в БД таблицы лидеров)
+class LeaderboardScore(LeaderboardBase):
+    __tablename__ = "leaderboard_scores"
+    
+    player = Column(String(40), primary_key=True)  # Имя игрока
+    points = Column(Integer, nullable=False, default=0)  # Сумма очков за все викторины
+    quizzes = Column(Integer, nullable=False, default=0)  # Сколько викторин пройдено
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Когда очки последний раз изменились
+    
+    def __repr__(self):
+        return f"<LeaderboardScore {self.player}: {self.points}>"
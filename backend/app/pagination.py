@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+from typing import Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+from app.config import get_settings
+
+# Постраничная выдача по ключу (keyset): курсор хранит ключ сортировки последней
+# записи страницы, следующая страница начинается сразу после него.
+# Для клиента курсор непрозрачен — это base64 от JSON со значениями ключа.
+# Курсор следующей страницы передаётся в заголовке X-Next-Cursor
+
+settings = get_settings()
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_size(limit: int) -> int:
+    """Размер страницы, ограниченный сверху max_page_size"""
+    return max(0, min(limit, settings.max_page_size))
+
+
+def encode_cursor(key: Sequence) -> str:
+    """Курсор из ключа сортировки записи"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[Tuple]:
+    """Ключ сортировки из курсора (None, если курсора нет); 400 на испорченный курсор"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, ValueError):
+        key = None
+    if (
+        not isinstance(key, list) or len(key) != size
+        or not all(value is None or type(value) is int for value in key)
+    ):
+        raise HTTPException(status_code=400, detail="Некорректный курсор страницы")
+    return tuple(key)
+
+
+def set_next_cursor(response: Response, page: Sequence, limit: int, key):
+    """Добавить курсор следующей страницы, если страница заполнена целиком"""
+    if limit and len(page) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(page[-1]))
+    return response
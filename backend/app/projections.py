@@ -0,0 +1,15 @@
+from fastapi import Query
+from sqlalchemy.orm import load_only
+
+# Проекции списков: "full" — запись целиком, "card" — только поля для карточек
+# в списках (без длинных текстов). Для карточки из БД читаются только её колонки,
+# а в JSON попадают только её поля
+
+VIEWS = ("full", "card")
+
+ViewParam = Query("full", regex="^(full|card)$", description="full — все поля, card — поля карточки")
+
+
+def load_view(query, model, schema):
+    """Ограничить ORM-запрос колонками схемы проекции"""
+    return query.options(load_only(*[getattr(model, name) for name in schema.__fields__]))
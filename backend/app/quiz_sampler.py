@@ -0,0 +1,64 @@
+import random
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from app import database
+from app.config import get_settings
+from app.dataset import DatasetCache
+from app.memory_store import get_store
+from app.models import QuizQuestion
+
+# Случайный выбор вопросов викторины без ORDER BY random().
+# Для каждой корзины (сложность, категория) заранее собран список id вопросов,
+# включая корзины "любая сложность" и "любая категория" (ключ None).
+# Выбор count вопросов — random.sample по готовому списку: его стоимость
+# зависит от count, а не от размера банка вопросов
+
+settings = get_settings()
+
+PoolKey = Tuple[Optional[str], Optional[str]]
+
+
+class QuizSampler:
+    """Списки id вопросов по корзинам (сложность, категория)"""
+
+    __slots__ = ("pools",)
+
+    def __init__(self, rows):
+        pools: Dict[PoolKey, List[int]] = {}
+        for question_id, difficulty, category in rows:
+            for key in {
+                (None, None), (difficulty, None), (None, category), (difficulty, category)
+            }:
+                pools.setdefault(key, []).append(question_id)
+        self.pools: Dict[PoolKey, Tuple[int, ...]] = {
+            key: tuple(ids) for key, ids in pools.items()
+        }
+
+    def sample(self, count: int, difficulty: Optional[str] = None,
+               category: Optional[str] = None) -> List[int]:
+        """count различных id из корзины в случайном порядке (меньше, если корзина мала)"""
+        pool = self.pools.get((difficulty or None, category or None), ())
+        return random.sample(pool, min(max(count, 0), len(pool)))
+
+
+def _load_rows():
+    if settings.data_mode == "memory":
+        return [(q.id, q.difficulty, q.category) for q in get_store().questions]
+    with database.engine.connect() as conn:
+        return conn.execute(
+            select(QuizQuestion.id, QuizQuestion.difficulty, QuizQuestion.category)
+            .order_by(QuizQuestion.id)
+        ).all()
+
+
+_sampler = DatasetCache(lambda: QuizSampler(_load_rows()))
+
+
+def get_sampler() -> QuizSampler:
+    """Корзины вопросов; собираются при первом обращении после заполнения БД"""
+    return _sampler.get()
+
+
+async def get_sampler_async() -> QuizSampler:
+    """Корзины вопросов для асинхронного обработчика; собираются в пуле потоков"""
+    return await _sampler.get_async()
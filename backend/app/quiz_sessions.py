@@ -0,0 +1,80 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+from app.config import get_settings
+from app.dataset import on_dataset_change
+
+# Сессии викторины в памяти процесса.
+# Сессия помнит, какие вопросы выданы, чтобы лист ответов проверялся одним
+# запросом и только по этим вопросам, и закрывается после проверки.
+# Устаревшие сессии удаляются по времени жизни, при переполнении — самые старые.
+# После заполнения БД id вопросов могут смениться, поэтому сессии сбрасываются
+
+settings = get_settings()
+
+
+class QuizSession(NamedTuple):
+    question_ids: Tuple[int, ...]
+    difficulty: Optional[str]
+    category: Optional[str]
+    created_at: float  # time.monotonic() на момент создания
+
+
+class QuizSessionStore:
+    """Сессии по id с ограничением числа и временем жизни"""
+
+    def __init__(self, max_sessions: int, ttl: float):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, QuizSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, question_ids, difficulty: Optional[str] = None,
+               category: Optional[str] = None) -> str:
+        """Создать сессию с выданными вопросами; вернуть её id"""
+        session_id = secrets.token_urlsafe(16)
+        session = QuizSession(tuple(question_ids), difficulty, category, time.monotonic())
+        with self._lock:
+            self._expire()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session_id
+
+    def get(self, session_id: str) -> Optional[QuizSession]:
+        """Открытая сессия (None, если её нет или она истекла)"""
+        with self._lock:
+            self._expire()
+            return self._sessions.get(session_id)
+
+    def close(self, session_id: str) -> Optional[QuizSession]:
+        """Забрать сессию для проверки (None, если её нет или она истекла); повторно не выдаётся"""
+        with self._lock:
+            self._expire()
+            return self._sessions.pop(session_id, None)
+
+    def _expire(self):
+        # Сессии упорядочены по времени создания — истекшие всегда в начале
+        deadline = time.monotonic() - self.ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.created_at > deadline:
+                break
+            del self._sessions[session_id]
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+quiz_sessions = QuizSessionStore(settings.quiz_session_max, settings.quiz_session_ttl)
+
+
+@on_dataset_change
+def _clear_sessions():
+    quiz_sessions.clear()
@@ -0,0 +1,168 @@
+import math
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from app.config import get_settings
+from app.dataset import dataset_changed
+from app.answer_key import get_answer_key
+from app.map_clusters import get_map_clusters
+from app.memory_store import get_store
+from app.quiz_sampler import get_sampler
+from app.spatial import get_spatial_index
+from app.timeline import get_epoch_intervals, get_event_timeline
+from app.snapshot import sqlite_path
+
+# Пересоздание БД без остановки: новые данные заполняются в фоне в теневой
+# файл рядом с рабочей БД, после чего копируются в рабочий файл одной транзакцией
+# (SQLite backup API) и теневой файл удаляется. В режиме WAL чтение на время
+# копирования не блокируется, а запросы, начатые до него, дочитывают прежние данные.
+# Рабочим остаётся файл из database_url: после перезапуска и в других процессах
+# (воркерах) видны те же новые данные — их кэши сбрасывает app.dataset.watch_dataset
+
+settings = get_settings()
+
+# Теневые файлы, не менявшиеся дольше этого (секунд), остались от прерванного
+# пересоздания; более свежие может прямо сейчас заполнять другой процесс
+SHADOW_GRACE = 600
+
+_lock = threading.Lock()
+_status = {
+    "state": "idle",  # idle, running, done, error
+    "step": None,  # Какая таблица сейчас заполняется
+    "tables_done": 0,
+    "tables_total": 0,
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+}
+
+
+def reseed_status() -> dict:
+    """Текущее состояние пересоздания БД"""
+    with _lock:
+        return dict(_status)
+
+
+def start_reseed() -> bool:
+    """Запустить пересоздание БД в фоне; False, если оно уже идёт"""
+    with _lock:
+        if _status["state"] == "running":
+            return False
+        _status.update(
+            state="running", step=None, tables_done=0, tables_total=0,
+            started_at=datetime.utcnow().isoformat(timespec="seconds"),
+            finished_at=None, error=None,
+        )
+    threading.Thread(target=_run, name="reseed", daemon=True).start()
+    return True
+
+
+def _update(**fields):
+    with _lock:
+        _status.update(fields)
+
+
+def _run():
+    from seed_data import TABLE_LABELS, build_dataset, dataset_hash, main as seed_main
+
+    def progress(model, done, total):
+        # После последней таблицы остаются поисковый индекс и копирование в рабочую БД
+        step = TABLE_LABELS[model] if done < total else "Замена рабочей БД"
+        _update(step=step, tables_done=done, tables_total=total)
+
+    try:
+        live_path = sqlite_path(settings.database_url)
+        if live_path is None:
+            # Теневую копию можно сделать только для файла SQLite — заполняем на месте
+            _update(step="Заполнение рабочей БД")
+            seed_main(force=True)
+        else:
+            dataset = build_dataset(settings.seed_extra_events)
+            load_via_shadow(live_path, dataset, dataset_hash(dataset), progress)
+            dataset_changed()
+
+        _update(step="Индексы карты, ленты времени и викторины")
+        warm_caches()
+    except Exception as e:
+        _update(state="error", step=None, error=str(e),
+                finished_at=datetime.utcnow().isoformat(timespec="seconds"))
+        print(f"❌ Ошибка пересоздания БД: {e}")
+        return
+
+    _update(state="done", step=None, finished_at=datetime.utcnow().isoformat(timespec="seconds"))
+    print("✅ База данных пересоздана")
+
+
+def load_via_shadow(live_path: Path, dataset, content_hash: str, progress=None):
+    """
+    Заполнить набором данных теневой файл рядом с рабочей БД и скопировать его
+    в рабочий файл. Рабочая БД не пересоздаётся на месте и не заполняется
+    с ослабленными настройками: сервер может читать её всё это время.
+    Возвращает отчёт загрузки (seed_data.load_dataset)
+    """
+    from seed_data import load_dataset
+
+    shadow_path = live_path.with_name(
+        f"{live_path.name}.shadow-{datetime.utcnow():%Y%m%d%H%M%S%f}"
+    )
+    # Одно соединение на всё заполнение и копирование: файл открыт до конца
+    shadow_engine = create_engine(f"sqlite:///{shadow_path.as_posix()}", poolclass=StaticPool)
+    try:
+        report = load_dataset(shadow_engine, dataset, content_hash, progress, bulk=True)
+        _copy_into(shadow_engine, live_path)
+    finally:
+        shadow_engine.dispose()
+        _unlink(live_path.parent.glob(f"{shadow_path.name}*"))
+    remove_stale_shadows()
+    return report
+
+
+def _copy_into(shadow_engine, live_path: Path):
+    """
+    Скопировать теневую БД в рабочий файл одной транзакцией записи —
+    через соединение, которым она заполнялась, а не заново по имени файла
+    """
+    source = shadow_engine.raw_connection()
+    target = sqlite3.connect(str(live_path), timeout=30)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def _unlink(paths, deadline: float = math.inf):
+    """Удалить файлы, не менявшиеся после deadline (time.time())"""
+    for path in paths:
+        try:
+            if path.stat().st_mtime <= deadline:
+                path.unlink()
+        except OSError:
+            # Файл уже удалён или ещё открыт (Windows) — удалим в следующий раз
+            pass
+
+
+def warm_caches():
+    """Построить данные и индексы в памяти сразу, а не на первом запросе"""
+    if settings.data_mode == "memory":
+        get_store()
+    get_map_clusters()
+    get_spatial_index()
+    get_event_timeline()
+    get_epoch_intervals()
+    get_answer_key()
+    get_sampler()
+
+
+def remove_stale_shadows():
+    """Удалить теневые файлы, оставшиеся от прерванных пересозданий (вместе с их журналами)"""
+    live_path = sqlite_path(settings.database_url)
+    if live_path is not None:
+        _unlink(
+            live_path.parent.glob(f"{live_path.name}.shadow-*"),
+            time.time() - SHADOW_GRACE
+        )
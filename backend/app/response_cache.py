@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from app.config import get_settings
+from app.dataset import on_dataset_change
+from app.http_cache import compress, is_cacheable, negotiate_encoding, request_key
+
+# Кэш готовых ответов API в памяти процесса.
+# Данные меняются только при заполнении БД, поэтому повторный одинаковый запрос
+# отдаётся из кэша без сессии, запроса к БД и сериализации pydantic.
+# Размер ограничен числом записей и суммарным объёмом тел ответов (LRU),
+# после заполнения БД кэш очищается целиком.
+# Сжатые варианты (br, gzip) хранятся рядом с исходным телом: каждый вариант
+# сжимается с максимальной степенью один раз, при первом запросе с этой кодировкой.
+# Ответы больше лимита кэша сжимаются на каждый запрос — быстро, не максимально
+
+settings = get_settings()
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    status_code: int
+    headers: tuple  # Пары (имя, значение) исходного ответа
+    variants: dict  # Кодировка -> сжатое тело
+
+
+class ResponseCache:
+    """LRU-кэш ответов с ограничением по числу записей и по байтам"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.generation = 0  # Растёт при каждой очистке
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedResponse, generation: int) -> bool:
+        """
+        Сохранить ответ; generation — значение на момент начала запроса,
+        чтобы ответ по прежним данным не попал в кэш после очистки.
+        False — ответ не сохранён (слишком большой или данные сменились)
+        """
+        size = _entry_size(entry)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return False
+        with self._lock:
+            if generation != self.generation:
+                return False
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= _entry_size(previous)
+            self._entries[key] = entry
+            self.size_bytes += size
+            self._evict()
+        return True
+
+    def variant(self, key: str, entry: CachedResponse, encoding: str) -> bytes:
+        """Сжатое тело ответа; сжимается при первом запросе и сохраняется в записи"""
+        data = entry.variants.get(encoding)
+        if data is not None:
+            return data
+        data = compress(entry.body, encoding)
+        with self._lock:
+            if encoding not in entry.variants:
+                entry.variants[encoding] = data
+                if self._entries.get(key) is entry:
+                    self.size_bytes += len(data)
+                    self._evict()
+        return data
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= _entry_size(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+            self.generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / requests, 4) if requests else None,
+            }
+
+
+def _entry_size(entry: CachedResponse) -> int:
+    return len(entry.body) + sum(len(data) for data in entry.variants.values())
+
+
+response_cache = ResponseCache(settings.response_cache_max_entries, settings.response_cache_max_bytes)
+
+
+@on_dataset_change
+def _clear_cache():
+    response_cache.clear()
+
+
+async def cached_response(request: Request, call_next):
+    """Middleware: отдать ответ из кэша или сохранить новый ответ в кэш"""
+    if response_cache.max_entries <= 0 or not is_cacheable(request):
+        return await call_next(request)
+
+    key = request_key(request)
+    entry = response_cache.get(key)
+    if entry is not None:
+        return await _send(request, key, entry, "HIT")
+
+    generation = response_cache.generation
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    entry = CachedResponse(body, response.status_code, tuple(response.raw_headers), {})
+    cached = response_cache.put(key, entry, generation)
+    return await _send(request, key, entry, "MISS", cached)
+
+
+async def _send(request: Request, key: str, entry: CachedResponse, cache_status: str,
+                cached: bool = True) -> Response:
+    """
+    Ответ из записи кэша в кодировке, которую принимает клиент
+    - cached: запись в кэше; иначе сжатый вариант не сохранится, и тело
+      сжимается быстро, а не с максимальной степенью
+    """
+    encoding = negotiate_encoding(request) if len(entry.body) >= settings.compression_min_size else None
+    if encoding is None:
+        body = entry.body
+    elif encoding in entry.variants:
+        body = entry.variants[encoding]
+    elif not cached:
+        body = await run_in_threadpool(compress, entry.body, encoding, True)
+    else:
+        # Сжатие с максимальной степенью небыстрое — не занимаем им цикл событий
+        body = await run_in_threadpool(response_cache.variant, key, entry, encoding)
+
+    response = Response(content=body, status_code=entry.status_code)
+    response.raw_headers = [
+        (name, value) for name, value in entry.headers if name != b"content-length"
+    ]
+    response.headers["Content-Length"] = str(len(body))
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["X-Cache"] = cache_status
+    return response
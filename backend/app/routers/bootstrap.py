@@ -0,0 +1,79 @@
+import hashlib
+from fastapi import APIRouter, Response
+from typing import List, Optional
+from app.dataset import dataset_generation, on_dataset_change, store_if_current
+from app.fragments import encode_json
+from app.routers import epochs, facts, gallery, geography, quiz
+from pydantic import BaseModel
+
+router = APIRouter(prefix="/api/bootstrap", tags=["bootstrap"])
+
+# Всё, что фронтенду нужно при первой загрузке, одним ответом.
+# Части собираются из тех же обработчиков, что и отдельные эндпоинты (и из тех же
+# готовых JSON-фрагментов), один раз за версию данных. Версия — хэш содержимого:
+# клиент присылает её в ?version= и при совпадении получает короткий ответ без данных
+
+class BootstrapResponse(BaseModel):
+    version: str  # Хэш содержимого; прислать в ?version=, чтобы не загружать данные повторно
+    changed: bool  # False — у клиента уже актуальная версия, остальные поля не передаются
+    epochs: Optional[List[epochs.EpochResponse]]
+    facts: Optional[List[facts.FactResponse]]
+    featured_gallery: Optional[List[gallery.GalleryImageResponse]]
+    major_cities: Optional[List[geography.GeographicPointResponse]]
+    quiz_categories: Optional[List[str]]
+
+
+_payload = None  # (версия, тело ответа)
+
+
+@on_dataset_change
+def _reset_payload():
+    _set_payload(None)
+
+
+def _set_payload(payload):
+    global _payload
+    _payload = payload
+
+
+async def _build_payload():
+    """Собрать тело ответа из частей и посчитать его версию"""
+    parts = [
+        ("epochs", (await epochs.get_all_epochs(include=None)).body),
+        ("facts", (await facts.get_all_facts(category=None)).body),
+        ("featured_gallery", (await gallery.get_gallery_images(
+            category=None, featured=True, view="full"
+        )).body),
+        ("major_cities", (await geography.get_major_cities(view="full")).body),
+        ("quiz_categories", encode_json((await quiz.get_quiz_categories())["categories"])),
+    ]
+    digest = hashlib.sha256()
+    for name, body in parts:
+        digest.update(name.encode("utf-8") + b"\0" + body + b"\0")
+    version = digest.hexdigest()[:16]
+
+    body = b"".join(
+        [b'{"version":', encode_json(version), b',"changed":true']
+        + [b',' + encode_json(name) + b':' + part for name, part in parts]
+        + [b"}"]
+    )
+    return version, body
+
+
+# Данные для первой загрузки приложения
+@router.get("", response_model=BootstrapResponse)
+async def get_bootstrap(version: Optional[str] = None):
+    """
+    Эпохи, факты, избранные изображения галереи, крупные города и категории викторины
+    - version: версия из прошлого ответа; если не изменилась, данные не передаются
+    """
+    payload = _payload
+    if payload is None:
+        generation = dataset_generation()
+        payload = await _build_payload()
+        store_if_current(generation, lambda: _set_payload(payload))
+    current, body = payload
+
+    if version == current:
+        body = encode_json({"version": current, "changed": False})
+    return Response(content=body, media_type="application/json")
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, HTTPException
+from sqlalchemy.orm import selectinload
+from typing import List, Optional, Union
+from app.config import get_settings
+from app.database import run_db
+from app.fragments import list_response, list_response_async
+from app.memory_store import get_store_async
 from app.models import Epoch, HistoricalEvent
+from app.timeline import get_epoch_intervals_async
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/epochs", tags=["epochs"])
+settings = get_settings()
 
 # Pydantic схемы для валидации
 class EpochBase(BaseModel):
@@ -41,18 +46,57 @@ class EpochWithEvents(EpochResponse):
 
 
 # Получить все эпохи
-@router.get("/", response_model=List[EpochResponse])
-def get_all_epochs(db: Session = Depends(get_db)):
-    """Получить список всех эпох"""
-    epochs = db.query(Epoch).order_by(Epoch.order_index).all()
-    return epochs
+@router.get("/", response_model=Union[List[EpochWithEvents], List[EpochResponse]])
+async def get_all_epochs(include: Optional[str] = None):
+    """
+    Получить список всех эпох
+    - include=events: вместе с событиями — вся лента времени за один запрос
+    """
+    schema = EpochWithEvents if include == "events" else EpochResponse
+    if settings.data_mode == "memory":
+        return await list_response_async(schema, (await get_store_async()).epochs)
+    
+    def load(db):
+        query = db.query(Epoch)
+        if schema is EpochWithEvents:
+            # Все события всех эпох одним дополнительным запросом, а не по запросу на эпоху
+            query = query.options(selectinload(Epoch.events))
+        return list_response(schema, query.order_by(Epoch.order_index, Epoch.id).all())
+    
+    return await run_db(load)
+
+
+# Эпохи, в которые входит год
+@router.get("/at/{year}", response_model=List[EpochResponse])
+async def get_epochs_at_year(year: int):
+    """
+    Получить эпохи, в которые входит год (границы эпох включены), в порядке отображения.
+    На стыке эпох год входит в обе; между эпохами — пустой список
+    """
+    ids = (await get_epoch_intervals_async()).at(year)
+    if settings.data_mode == "memory":
+        epochs = (await get_store_async()).epochs_by_id
+        return await list_response_async(EpochResponse, [epochs[epoch_id] for epoch_id in ids])
+    if not ids:
+        return []
+    
+    def load(db):
+        epochs = {e.id: e for e in db.query(Epoch).filter(Epoch.id.in_(ids))}
+        return list_response(EpochResponse, [epochs[epoch_id] for epoch_id in ids if epoch_id in epochs])
+    
+    return await run_db(load)
 
 
 # Получить эпоху с событиями
 @router.get("/{epoch_id}", response_model=EpochWithEvents)
-def get_epoch_with_events(epoch_id: int, db: Session = Depends(get_db)):
+async def get_epoch_with_events(epoch_id: int):
     """Получить эпоху со всеми событиями"""
-    epoch = db.query(Epoch).filter(Epoch.id == epoch_id).first()
+    if settings.data_mode == "memory":
+        epoch = (await get_store_async()).epochs_by_id.get(epoch_id)
+    else:
+        epoch = await run_db(lambda db: db.query(Epoch).options(
+            selectinload(Epoch.events)
+        ).filter(Epoch.id == epoch_id).first())
     if not epoch:
         raise HTTPException(status_code=404, detail="Эпоха не найдена")
     return epoch
\ No newline at end of file
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
-from app.database import get_db
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import and_, or_, tuple_
+import bisect
+from typing import List, Optional, Union
+from app.config import get_settings
+from app.database import run_db
+from app.fragments import list_response, list_response_async
+from app.memory_store import event_order, event_order_key, get_store, get_store_async, like_contains
 from app.models import HistoricalEvent
+from app.pagination import decode_cursor, page_size, set_next_cursor
+from app.projections import ViewParam, load_view
+from app.timeline import year_slice
+from app.search import SEARCH_INDEXES, hit_snippet, match_ids, search_available, search as fts_search
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/events", tags=["events"])
+settings = get_settings()
 
 # Pydantic схемы
 class EventResponse(BaseModel):
@@ -24,53 +32,196 @@ class EventResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class EventCard(BaseModel):
+    """Карточка события в списках: без полного описания"""
+    id: int
+    epoch_id: int
+    title: str
+    year: int
+    date_description: str
+    short_description: str
+    image_url: str
+    importance: int
+    
+    class Config:
+        orm_mode = True
+
+EVENT_VIEWS = {"full": EventResponse, "card": EventCard}
+
+class EventSearchResult(EventResponse):
+    rank: Optional[float] = None  # Релевантность (bm25): чем меньше, тем лучше
+    snippet: Optional[str] = None  # Фрагмент текста, совпадения выделены <b>...</b>
+
+
+def _event_key(event):
+    """Ключ курсора события: (год, id)"""
+    return (event.year, event.id)
+
+
+def _after_event(key):
+    """Условие "после события с ключом (год, id)" в порядке ленты (NULL-годы первыми)"""
+    year, event_id = key
+    if year is None:
+        return or_(
+            and_(HistoricalEvent.year.is_(None), HistoricalEvent.id > event_id),
+            HistoricalEvent.year.isnot(None)
+        )
+    return tuple_(HistoricalEvent.year, HistoricalEvent.id) > tuple_(year, event_id)
+
+
+def _matching_ids(db, search: str):
+    """id событий под запрос по полнотекстовому индексу (None, если индекса нет)"""
+    if not search_available(db, "events"):
+        return None
+    return set(db.execute(match_ids("events", search)).scalars())
+
 
 # Получить все события
-@router.get("/", response_model=List[EventResponse])
-def get_all_events(
+@router.get("/", response_model=Union[List[EventResponse], List[EventCard]])
+async def get_all_events(
     skip: int = 0,
     limit: int = 100,
     epoch_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    from_year: Optional[int] = None,
+    to_year: Optional[int] = None,
+    cursor: Optional[str] = None,
+    view: str = ViewParam
 ):
     """
     Получить список событий с фильтрацией
     - epoch_id: фильтр по эпохе
-    - search: поиск по названию и описанию
+    - from_year, to_year: годы события, границы включены (события без года не входят)
+    - search: поиск по названию и описанию (без учёта регистра и ё/е)
+    - cursor: продолжить после страницы, курсор из заголовка X-Next-Cursor
+    - limit: не больше max_page_size
+    - view: full — все поля, card — карточка без полного описания
     """
-    query = db.query(HistoricalEvent)
+    schema = EVENT_VIEWS[view]
+    limit = page_size(limit)
+    after = decode_cursor(cursor, 2)
+    if settings.data_mode == "memory":
+        store = await get_store_async()
+        events = store.events_by_epoch.get(epoch_id, ()) if epoch_id else store.events
+        keys = store.event_keys_by_epoch.get(epoch_id, ()) if epoch_id else store.event_keys
+        events, keys = year_slice(events, keys, from_year, to_year)
+        found = await run_db(_matching_ids, search) if search else None
+        if found is not None:
+            events = [e for e in events if e.id in found]
+        elif search:
+            events = [
+                e for e in events
+                if like_contains(e.title, search) or like_contains(e.description, search)
+            ]
+        if search:
+            keys = [event_order(e) for e in events]
+        start = skip
+        if after:
+            start += bisect.bisect_right(keys, event_order_key(*after))
+        page = events[start:start + limit]
+        return set_next_cursor(await list_response_async(schema, page), page, limit, _event_key)
     
-    if epoch_id:
-        query = query.filter(HistoricalEvent.epoch_id == epoch_id)
+    def load(db):
+        query = load_view(db.query(HistoricalEvent), HistoricalEvent, schema)
+        
+        if epoch_id:
+            query = query.filter(HistoricalEvent.epoch_id == epoch_id)
+        
+        if from_year is not None:
+            query = query.filter(HistoricalEvent.year >= from_year)
+        
+        if to_year is not None:
+            query = query.filter(HistoricalEvent.year <= to_year)
+        
+        if search and search_available(db, "events"):
+            query = query.filter(HistoricalEvent.id.in_(match_ids("events", search)))
+        elif search:
+            query = query.filter(
+                or_(
+                    HistoricalEvent.title.contains(search),
+                    HistoricalEvent.description.contains(search)
+                )
+            )
+        
+        if after:
+            query = query.filter(_after_event(after))
+        
+        # id в сортировке делает порядок однозначным: курсор указывает точное место
+        events = query.order_by(HistoricalEvent.year, HistoricalEvent.id).offset(skip).limit(limit).all()
+        return set_next_cursor(list_response(schema, events), events, limit, _event_key)
     
-    if search:
-        query = query.filter(
-            or_(
-                HistoricalEvent.title.contains(search),
-                HistoricalEvent.description.contains(search)
+    return await run_db(load)
+
+
+# Полнотекстовый поиск событий
+@router.get("/search", response_model=List[EventSearchResult])
+async def search_events(
+    q: str,
+    skip: int = 0,
+    limit: int = 20
+):
+    """
+    Найти события по названию и описанию, самые релевантные первыми
+    - q: слова для поиска (по началу слова, без учёта регистра и ё/е)
+    - limit: не больше max_page_size
+    """
+    limit = page_size(limit)
+    
+    def load(db):
+        if not search_available(db, "events"):
+            raise HTTPException(status_code=503, detail="Полнотекстовый поиск недоступен")
+        
+        hits = fts_search(db, "events", q, limit=limit, offset=skip)
+        ids = [hit.id for hit in hits]
+        if settings.data_mode == "memory":
+            events = get_store().events_by_id
+        else:
+            events = {e.id: e for e in db.query(HistoricalEvent).filter(HistoricalEvent.id.in_(ids))}
+        
+        columns = SEARCH_INDEXES["events"].columns
+        return [
+            EventSearchResult(
+                **EventResponse.from_orm(events[hit.id]).dict(),
+                rank=hit.rank,
+                snippet=hit_snippet(hit, events[hit.id], columns)
             )
-        )
+            for hit in hits if hit.id in events
+        ]
     
-    events = query.order_by(HistoricalEvent.year).offset(skip).limit(limit).all()
-    return events
+    return await run_db(load)
 
 
 # Получить событие по ID
 @router.get("/{event_id}", response_model=EventResponse)
-def get_event(event_id: int, db: Session = Depends(get_db)):
+async def get_event(event_id: int):
     """Получить конкретное событие"""
-    event = db.query(HistoricalEvent).filter(HistoricalEvent.id == event_id).first()
+    if settings.data_mode == "memory":
+        event = (await get_store_async()).events_by_id.get(event_id)
+    else:
+        event = await run_db(
+            lambda db: db.query(HistoricalEvent).filter(HistoricalEvent.id == event_id).first()
+        )
     if not event:
         raise HTTPException(status_code=404, detail="Событие не найдено")
     return event
 
 
 # Получить важные события (топ по важности)
-@router.get("/important/top", response_model=List[EventResponse])
-def get_important_events(limit: int = 10, db: Session = Depends(get_db)):
-    """Получить самые важные события"""
-    events = db.query(HistoricalEvent).order_by(
-        HistoricalEvent.importance.desc()
-    ).limit(limit).all()
-    return events
\ No newline at end of file
+@router.get("/important/top", response_model=Union[List[EventResponse], List[EventCard]])
+async def get_important_events(limit: int = 10, view: str = ViewParam):
+    """
+    Получить самые важные события
+    - limit: не больше max_page_size
+    """
+    limit = page_size(limit)
+    schema = EVENT_VIEWS[view]
+    if settings.data_mode == "memory":
+        return await list_response_async(schema, (await get_store_async()).events_by_importance[:limit])
+    
+    def load(db):
+        events = load_view(db.query(HistoricalEvent), HistoricalEvent, schema).order_by(
+            HistoricalEvent.importance.desc(), HistoricalEvent.id
+        ).limit(limit).all()
+        return list_response(schema, events)
+    
+    return await run_db(load)
\ No newline at end of file
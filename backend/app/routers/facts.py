@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException
 from sqlalchemy import func
+import random
 from typing import List, Optional
-from app.database import get_db
+from app.config import get_settings
+from app.database import run_db
+from app.fragments import list_response, list_response_async
+from app.memory_store import get_store_async
 from app.models import InterestingFact
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/facts", tags=["facts"])
+settings = get_settings()
 
 # Pydantic схемы
 class FactResponse(BaseModel):
@@ -22,25 +26,36 @@ class FactResponse(BaseModel):
 
 # Получить все факты
 @router.get("/", response_model=List[FactResponse])
-def get_all_facts(
-    category: Optional[str] = None,
-    db: Session = Depends(get_db)
+async def get_all_facts(
+    category: Optional[str] = None
 ):
     """Получить интересные факты о Енисее"""
-    query = db.query(InterestingFact)
+    if settings.data_mode == "memory":
+        store = await get_store_async()
+        facts = store.facts_by_category.get(category, ()) if category else store.facts
+        return await list_response_async(FactResponse, facts)
     
-    if category:
-        query = query.filter(InterestingFact.category == category)
+    def load(db):
+        query = db.query(InterestingFact)
+        
+        if category:
+            query = query.filter(InterestingFact.category == category)
+        
+        facts = query.order_by(InterestingFact.order_index, InterestingFact.id).all()
+        return list_response(FactResponse, facts)
     
-    facts = query.order_by(InterestingFact.order_index).all()
-    return facts
+    return await run_db(load)
 
 
 # Получить случайный факт
 @router.get("/random", response_model=FactResponse)
-def get_random_fact(db: Session = Depends(get_db)):
+async def get_random_fact():
     """Получить случайный факт"""
-    fact = db.query(InterestingFact).order_by(func.random()).first()
+    if settings.data_mode == "memory":
+        facts = (await get_store_async()).facts
+        fact = random.choice(facts) if facts else None
+    else:
+        fact = await run_db(lambda db: db.query(InterestingFact).order_by(func.random()).first())
     if not fact:
         raise HTTPException(status_code=404, detail="Факты не найдены")
     return fact
\ No newline at end of file
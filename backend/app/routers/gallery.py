@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database import get_db
+from fastapi import APIRouter, HTTPException
+from typing import List, Optional, Union
+from app.config import get_settings
+from app.database import run_db
+from app.fragments import list_response, list_response_async
+from app.memory_store import get_store_async
 from app.models import GalleryImage
+from app.projections import ViewParam, load_view
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/gallery", tags=["gallery"])
+settings = get_settings()
 
 # Pydantic схемы
 class GalleryImageResponse(BaseModel):
@@ -23,35 +27,67 @@ class GalleryImageResponse(BaseModel):
         orm_mode = True
 
 
+class GalleryImageCard(BaseModel):
+    """Миниатюра в сетке галереи: без описания"""
+    id: int
+    title: str
+    image_url: str
+    category: str
+    location: str
+    is_featured: bool
+    
+    class Config:
+        orm_mode = True
+
+GALLERY_VIEWS = {"full": GalleryImageResponse, "card": GalleryImageCard}
+
+
 # Получить все изображения галереи
-@router.get("/", response_model=List[GalleryImageResponse])
-def get_gallery_images(
+@router.get("/", response_model=Union[List[GalleryImageResponse], List[GalleryImageCard]])
+async def get_gallery_images(
     category: Optional[str] = None,
     featured: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    view: str = ViewParam
 ):
     """
     Получить изображения галереи
     - category: фильтр по категории
     - featured: только избранные
+    - view: full — все поля, card — миниатюра без описания
     """
-    query = db.query(GalleryImage)
-    
-    if category:
-        query = query.filter(GalleryImage.category == category)
+    schema = GALLERY_VIEWS[view]
+    if settings.data_mode == "memory":
+        store = await get_store_async()
+        images = store.gallery_by_category.get(category, ()) if category else store.gallery
+        if featured is not None:
+            images = [image for image in images if bool(image.is_featured) == featured]
+        return await list_response_async(schema, images)
     
-    if featured is not None:
-        query = query.filter(GalleryImage.is_featured == featured)
+    def load(db):
+        query = load_view(db.query(GalleryImage), GalleryImage, schema)
+        
+        if category:
+            query = query.filter(GalleryImage.category == category)
+        
+        if featured is not None:
+            query = query.filter(GalleryImage.is_featured == featured)
+        
+        images = query.order_by(GalleryImage.order_index, GalleryImage.id).all()
+        return list_response(schema, images)
     
-    images = query.order_by(GalleryImage.order_index).all()
-    return images
+    return await run_db(load)
 
 
 # Получить изображение по ID
 @router.get("/{image_id}", response_model=GalleryImageResponse)
-def get_gallery_image(image_id: int, db: Session = Depends(get_db)):
+async def get_gallery_image(image_id: int):
     """Получить конкретное изображение"""
-    image = db.query(GalleryImage).filter(GalleryImage.id == image_id).first()
+    if settings.data_mode == "memory":
+        image = (await get_store_async()).gallery_by_id.get(image_id)
+    else:
+        image = await run_db(
+            lambda db: db.query(GalleryImage).filter(GalleryImage.id == image_id).first()
+        )
     if not image:
         raise HTTPException(status_code=404, detail="Изображение не найдено")
     return image
\ No newline at end of file
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Query, Response
 from sqlalchemy import or_
-from typing import List, Optional
-from app.database import get_db
+import bisect
+from itertools import islice
+from typing import List, Optional, Union
+from app.config import get_settings
+from app.database import run_db
+from app.fragments import encode_json, list_response, list_response_async, render_all_async
+from app.map_clusters import get_map_clusters_async
+from app.memory_store import get_store, get_store_async, like_contains
 from app.models import GeographicPoint
+from app.pagination import decode_cursor, page_size, set_next_cursor
+from app.projections import ViewParam, load_view
+from app.spatial import get_spatial_index_async
+from app.search import SEARCH_INDEXES, hit_snippet, search_available, search as fts_search
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/geography", tags=["geography"])
+settings = get_settings()
 
 # Pydantic схемы
 class GeographicPointResponse(BaseModel):
@@ -26,67 +36,283 @@ class GeographicPointResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class GeographicPointCard(BaseModel):
+    """Точка для карты и списков: без полного описания"""
+    id: int
+    name: str
+    type: str
+    latitude: float
+    longitude: float
+    short_description: str
+    population: Optional[int]
+    icon: str
+    color: str
+    
+    class Config:
+        orm_mode = True
+
+POINT_VIEWS = {"full": GeographicPointResponse, "card": GeographicPointCard}
+
+class GeographicPointSearchResult(GeographicPointResponse):
+    rank: Optional[float] = None  # Релевантность (bm25): чем меньше, тем лучше
+    snippet: Optional[str] = None  # Фрагмент текста, совпадения выделены <b>...</b>
+
+class NearbyPoint(GeographicPointResponse):
+    distance_km: float  # Расстояние до заданной точки по поверхности Земли, с точностью до метра
+
+class NearbyPointCard(GeographicPointCard):
+    distance_km: float
+
+NEARBY_VIEWS = {"full": NearbyPoint, "card": NearbyPointCard}
+
+class MapClusterResponse(BaseModel):
+    latitude: float  # Центр кластера
+    longitude: float
+    count: int  # Точек в кластере
+    type: Optional[str]  # Самый частый тип точек
+    color: Optional[str]  # Самый частый цвет маркеров
+    point_id: Optional[int]  # id точки, если кластер из одной точки
+    expansion_zoom: Optional[int]  # Масштаб, на котором кластер распадается
+
+
+def _point_cursor(point):
+    """Ключ курсора точки: (id,)"""
+    return (point.id,)
+
 
 # Получить все географические точки
-@router.get("/", response_model=List[GeographicPointResponse])
-def get_geographic_points(
+@router.get("/", response_model=Union[List[GeographicPointResponse], List[GeographicPointCard]])
+async def get_geographic_points(
     type: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    view: str = ViewParam
 ):
     """
     Получить географические точки
     - type: фильтр по типу (city, landmark, nature, historical)
+    - cursor: продолжить после страницы, курсор из заголовка X-Next-Cursor
+    - limit: не больше max_page_size
+    - view: full — все поля, card — точка без полного описания
     """
-    query = db.query(GeographicPoint)
+    schema = POINT_VIEWS[view]
+    limit = page_size(limit)
+    after = decode_cursor(cursor, 1)
+    if settings.data_mode == "memory":
+        store = await get_store_async()
+        points = store.points_by_type.get(type, ()) if type else store.points
+        ids = store.point_ids_by_type.get(type, ()) if type else store.point_ids
+        start = skip
+        if after:
+            start += bisect.bisect_right(ids, after[0])
+        page = points[start:start + limit]
+        return set_next_cursor(await list_response_async(schema, page), page, limit, _point_cursor)
     
-    if type:
-        query = query.filter(GeographicPoint.type == type)
+    def load(db):
+        query = load_view(db.query(GeographicPoint), GeographicPoint, schema)
+        
+        if type:
+            query = query.filter(GeographicPoint.type == type)
+        
+        if after:
+            query = query.filter(GeographicPoint.id > after[0])
+        
+        points = query.order_by(GeographicPoint.id).offset(skip).limit(limit).all()
+        return set_next_cursor(list_response(schema, points), points, limit, _point_cursor)
     
-    points = query.offset(skip).limit(limit).all()
-    return points
+    return await run_db(load)
+
+
+async def _points_by_ids(ids: List[int], schema):
+    """Точки с данными id в том же порядке"""
+    if settings.data_mode == "memory":
+        points = (await get_store_async()).points_by_id
+        return [points[point_id] for point_id in ids]
+    if not ids:
+        return []
+
+    def load(db):
+        query = load_view(db.query(GeographicPoint), GeographicPoint, schema)
+        points = {p.id: p for p in query.filter(GeographicPoint.id.in_(ids))}
+        return [points[point_id] for point_id in ids if point_id in points]
+
+    return await run_db(load)
+
+
+# Точки в прямоугольнике видимой области карты
+@router.get("/bbox", response_model=Union[List[GeographicPointResponse], List[GeographicPointCard]])
+async def get_points_in_bbox(
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    type: Optional[str] = None,
+    limit: int = 500,
+    cursor: Optional[str] = None,
+    view: str = ViewParam
+):
+    """
+    Получить точки внутри прямоугольника (границы включены), по порядку id
+    - south, west, north, east: границы в градусах; west > east — через 180-й меридиан
+    - type: фильтр по типу (city, landmark, nature, historical)
+    - cursor: продолжить после страницы, курсор из заголовка X-Next-Cursor
+    - limit: не больше max_page_size
+    - view: full — все поля, card — точка без полного описания
+    """
+    schema = POINT_VIEWS[view]
+    limit = page_size(limit)
+    after = decode_cursor(cursor, 1)
+    ids = (await get_spatial_index_async()).bbox(south, west, north, east, limit, type, after[0] if after else None)
+    points = await _points_by_ids(ids, schema)
+    return set_next_cursor(await list_response_async(schema, points), points, limit, _point_cursor)
+
+
+# Ближайшие точки
+@router.get("/near", response_model=Union[List[NearbyPoint], List[NearbyPointCard]])
+async def get_nearest_points(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1),
+    type: Optional[str] = None,
+    view: str = ViewParam
+):
+    """
+    Получить k точек, ближайших к (lat, lon) по поверхности Земли, ближайшие первыми,
+    с расстоянием distance_km
+    - k: не больше max_page_size
+    - type: фильтр по типу (city, landmark, nature, historical)
+    - view: full — все поля, card — точка без полного описания
+    """
+    schema = POINT_VIEWS[view]
+    nearest = (await get_spatial_index_async()).near(lat, lon, page_size(k), type)
+    points = await _points_by_ids([point_id for point_id, _ in nearest], schema)
+    distances = dict(nearest)
+    # Фрагмент точки дополняется расстоянием: {...} -> {...,"distance_km":...}
+    body = b"[" + b",".join([
+        fragment[:-1] + b',"distance_km":' + encode_json(round(distances[point.id], 3)) + b"}"
+        for point, fragment in zip(points, await render_all_async(schema, points))
+    ]) + b"]"
+    return Response(content=body, media_type="application/json")
+
+
+# Кластеры маркеров для карты
+@router.get("/clusters", response_model=List[MapClusterResponse])
+async def get_map_clusters_in_bbox(
+    zoom: int = Query(..., ge=0, le=30),
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    type: Optional[str] = None
+):
+    """
+    Получить кластеры точек для масштаба карты zoom с центром в прямоугольнике
+    - south, west, north, east: границы в градусах; west > east — через 180-й меридиан
+    - type: фильтр по типу (city, landmark, nature, historical)
+    Кластер из одной точки содержит её point_id; по клику на кластер карту
+    достаточно приблизить до expansion_zoom
+    """
+    clusters = (await get_map_clusters_async()).bbox(zoom, south, west, north, east, type)
+    body = b"[" + b",".join([cluster.fragment for cluster in clusters]) + b"]"
+    return Response(content=body, media_type="application/json")
 
 
 # Получить точку по ID
 @router.get("/{point_id}", response_model=GeographicPointResponse)
-def get_geographic_point(point_id: int, db: Session = Depends(get_db)):
+async def get_geographic_point(point_id: int):
     """Получить конкретную географическую точку"""
-    point = db.query(GeographicPoint).filter(GeographicPoint.id == point_id).first()
+    if settings.data_mode == "memory":
+        point = (await get_store_async()).points_by_id.get(point_id)
+    else:
+        point = await run_db(
+            lambda db: db.query(GeographicPoint).filter(GeographicPoint.id == point_id).first()
+        )
     if not point:
         raise HTTPException(status_code=404, detail="Точка не найдена")
     return point
 
 
 # Получить крупные города
-@router.get("/cities/major", response_model=List[GeographicPointResponse])
-def get_major_cities(db: Session = Depends(get_db)):
+@router.get("/cities/major", response_model=Union[List[GeographicPointResponse], List[GeographicPointCard]])
+async def get_major_cities(view: str = ViewParam):
     """Получить крупные города на Енисее"""
-    cities = db.query(GeographicPoint).filter(
-        GeographicPoint.type == "city",
-        GeographicPoint.population != None
-    ).order_by(GeographicPoint.population.desc()).limit(10).all()
-    return cities
+    schema = POINT_VIEWS[view]
+    if settings.data_mode == "memory":
+        return await list_response_async(schema, (await get_store_async()).major_cities)
+    
+    def load(db):
+        cities = load_view(db.query(GeographicPoint), GeographicPoint, schema).filter(
+            GeographicPoint.type == "city",
+            GeographicPoint.population != None
+        ).order_by(GeographicPoint.population.desc(), GeographicPoint.id).limit(10).all()
+        return list_response(schema, cities)
+    
+    return await run_db(load)
 
 
 # Получить достопримечательности
-@router.get("/landmarks/", response_model=List[GeographicPointResponse])
-def get_landmarks(db: Session = Depends(get_db)):
+@router.get("/landmarks/", response_model=Union[List[GeographicPointResponse], List[GeographicPointCard]])
+async def get_landmarks(view: str = ViewParam):
     """Получить достопримечательности"""
-    landmarks = db.query(GeographicPoint).filter(
-        GeographicPoint.type == "landmark"
-    ).all()
-    return landmarks
+    schema = POINT_VIEWS[view]
+    if settings.data_mode == "memory":
+        return await list_response_async(schema, (await get_store_async()).points_by_type.get("landmark", ()))
+    
+    def load(db):
+        landmarks = load_view(db.query(GeographicPoint), GeographicPoint, schema).filter(
+            GeographicPoint.type == "landmark"
+        ).all()
+        return list_response(schema, landmarks)
+    
+    return await run_db(load)
 
 
 # Поиск по названию
-@router.get("/search/{query}", response_model=List[GeographicPointResponse])
-def search_points(query: str, db: Session = Depends(get_db)):
-    """Поиск географических точек по названию"""
-    points = db.query(GeographicPoint).filter(
-        or_(
-            GeographicPoint.name.contains(query),
-            GeographicPoint.description.contains(query)
-        )
-    ).all()
-    return points
+@router.get("/search/{query}", response_model=List[GeographicPointSearchResult])
+async def search_points(query: str, limit: int = 50):
+    """
+    Поиск географических точек по названию и описанию, самые релевантные первыми
+    (по началу слова, без учёта регистра и ё/е)
+    - limit: не больше max_page_size
+    """
+    limit = page_size(limit)
+    
+    def load(db):
+        if search_available(db, "points"):
+            hits = fts_search(db, "points", query, limit=limit)
+            ids = [hit.id for hit in hits]
+            if settings.data_mode == "memory":
+                points = get_store().points_by_id
+            else:
+                points = {
+                    p.id: p for p in
+                    db.query(GeographicPoint).filter(GeographicPoint.id.in_(ids))
+                }
+        
+            columns = SEARCH_INDEXES["points"].columns
+            return [
+                GeographicPointSearchResult(
+                    **GeographicPointResponse.from_orm(points[hit.id]).dict(),
+                    rank=hit.rank,
+                    snippet=hit_snippet(hit, points[hit.id], columns)
+                )
+                for hit in hits if hit.id in points
+            ]
+        
+        # Без полнотекстового индекса — простой поиск по вхождению строки
+        if settings.data_mode == "memory":
+            return list(islice((
+                p for p in get_store().points
+                if like_contains(p.name, query) or like_contains(p.description, query)
+            ), limit))
+        
+        points = db.query(GeographicPoint).filter(
+            or_(
+                GeographicPoint.name.contains(query),
+                GeographicPoint.description.contains(query)
+            )
+        ).order_by(GeographicPoint.id).limit(limit).all()
+        return points
+    
+    return await run_db(load)
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException
+from typing import List
+from app.leaderboard import get_leaderboard
+from app.pagination import page_size
+from pydantic import BaseModel
+
+router = APIRouter(prefix="/api/quiz/leaderboard", tags=["quiz"])
+
+# Таблица лидеров викторины: очки засчитываются в /api/quiz/check-answers
+# с именем игрока, рейтинг отдаётся из памяти (app/leaderboard.py) без запросов к БД
+
+# Pydantic схемы
+class LeaderboardEntry(BaseModel):
+    rank: int  # Место в рейтинге (с 1)
+    player: str
+    points: int  # Сумма очков за все викторины
+    quizzes: int  # Сколько викторин пройдено
+
+
+def _entry(rank: int, score) -> LeaderboardEntry:
+    return LeaderboardEntry(rank=rank, player=score.player, points=score.points, quizzes=score.quizzes)
+
+
+# Получить таблицу лидеров
+@router.get("", response_model=List[LeaderboardEntry])
+async def get_leaderboard_page(limit: int = 10, offset: int = 0):
+    """
+    Получить игроков по местам: больше очков — выше, при равенстве выше тот,
+    кто набрал их раньше
+    - limit: количество записей (не больше max_page_size)
+    - offset: сколько первых мест пропустить
+    """
+    return [_entry(rank, score) for rank, score in get_leaderboard().top(page_size(limit), max(0, offset))]
+
+
+# Получить место игрока
+@router.get("/{player}", response_model=LeaderboardEntry)
+async def get_player_rank(player: str):
+    """Получить место и очки игрока"""
+    found = get_leaderboard().rank(player)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Игрок не найден")
+    return _entry(*found)
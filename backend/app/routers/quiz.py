@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, HTTPException
 from typing import List, Optional
-from app.database import get_db
+from app.config import get_settings
+from app.database import run_db
+from app.memory_store import get_store_async
+from app.answer_key import get_answer_key_async
+from app.leaderboard import get_leaderboard
+from app.quiz_sampler import get_sampler_async
+from app.quiz_sessions import quiz_sessions
 from app.models import QuizQuestion
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, constr
 
 router = APIRouter(prefix="/api/quiz", tags=["quiz"])
+settings = get_settings()
 
 # Pydantic схемы
 class QuizQuestionResponse(BaseModel):
@@ -33,14 +38,53 @@ class QuizAnswerResponse(BaseModel):
     explanation: str
     points_earned: int
 
+class QuizSessionRequest(BaseModel):
+    count: int = 10
+    difficulty: Optional[str] = None  # easy, medium, hard
+    category: Optional[str] = None
+
+class QuizSessionResponse(BaseModel):
+    session_id: str  # Передать в /check-answers вместе с ответами
+    questions: List[QuizQuestionResponse]
+
+class QuizSheetRequest(BaseModel):
+    session_id: Optional[str] = None  # Без сессии проверяются ответы на любые вопросы
+    answers: List[QuizAnswerRequest] = Field(..., max_items=settings.max_page_size)
+    player: Optional[constr(strip_whitespace=True, min_length=1, max_length=40)] = None  # Засчитать очки в таблицу лидеров
+
+class QuizAnswerResult(QuizAnswerResponse):
+    question_id: int
+    answer: Optional[str]  # Ответ пользователя; None — вопрос сессии остался без ответа
+
+class QuizSheetResponse(BaseModel):
+    session_id: Optional[str]
+    results: List[QuizAnswerResult]
+    correct_count: int
+    total_points: int  # Набрано очков
+    max_points: int  # Очков за все вопросы листа (сессии)
+    rank: Optional[int] = None  # Место игрока в таблице лидеров после проверки
+
+
+async def _questions_by_ids(ids: List[int]) -> list:
+    """Вопросы с данными id в том же порядке (неизвестные id пропускаются)"""
+    if not ids:
+        return []
+    if settings.data_mode == "memory":
+        questions_by_id = (await get_store_async()).questions_by_id
+    else:
+        # Вопросы читаются по первичному ключу одним запросом
+        questions_by_id = await run_db(
+            lambda db: {q.id: q for q in db.query(QuizQuestion).filter(QuizQuestion.id.in_(ids))}
+        )
+    return [questions_by_id[question_id] for question_id in ids if question_id in questions_by_id]
+
 
 # Получить случайные вопросы для викторины
 @router.get("/questions/random", response_model=List[QuizQuestionResponse])
-def get_random_questions(
+async def get_random_questions(
     count: int = 10,
     difficulty: Optional[str] = None,
-    category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    category: Optional[str] = None
 ):
     """
     Получить случайные вопросы для викторины
@@ -48,42 +92,109 @@ def get_random_questions(
     - difficulty: easy, medium, hard
     - category: география, история, экология, культура
     """
-    query = db.query(QuizQuestion)
-    
-    if difficulty:
-        query = query.filter(QuizQuestion.difficulty == difficulty)
-    
-    if category:
-        query = query.filter(QuizQuestion.category == category)
-    
-    questions = query.order_by(func.random()).limit(count).all()
-    return questions
+    sampler = await get_sampler_async()
+    return await _questions_by_ids(sampler.sample(count, difficulty, category))
+
+
+# Начать викторину
+@router.post("/sessions", response_model=QuizSessionResponse)
+async def start_quiz_session(request: QuizSessionRequest):
+    """
+    Выдать случайные вопросы и открыть сессию: все ответы на них проверяются
+    одним запросом /check-answers с session_id
+    """
+    sampler = await get_sampler_async()
+    questions = await _questions_by_ids(
+        sampler.sample(request.count, request.difficulty, request.category)
+    )
+    session_id = quiz_sessions.create(
+        [q.id for q in questions], request.difficulty, request.category
+    )
+    return QuizSessionResponse(
+        session_id=session_id,
+        questions=[QuizQuestionResponse.from_orm(q) for q in questions]
+    )
 
 
 # Проверить ответ
 @router.post("/check-answer", response_model=QuizAnswerResponse)
-def check_answer(answer: QuizAnswerRequest, db: Session = Depends(get_db)):
-    """Проверить ответ пользователя"""
-    question = db.query(QuizQuestion).filter(
-        QuizQuestion.id == answer.question_id
-    ).first()
-    
-    if not question:
+async def check_answer(answer: QuizAnswerRequest):
+    """Проверить ответ пользователя (по ключу ответов в памяти, без запроса к БД)"""
+    result = (await get_answer_key_async()).grade(answer.question_id, answer.answer)
+    if result is None:
         raise HTTPException(status_code=404, detail="Вопрос не найден")
     
-    is_correct = question.correct_answer.upper() == answer.answer.upper()
+    return QuizAnswerResponse(**result)
+
+
+# Проверить все ответы викторины
+@router.post("/check-answers", response_model=QuizSheetResponse)
+async def check_answers(sheet: QuizSheetRequest):
+    """
+    Проверить лист ответов одним запросом
+    - session_id: сессия из /sessions — проверяются только её вопросы, вопросы
+      без ответа засчитываются как неверные, после проверки сессия закрывается
+    - answers: ответы {question_id, answer}, не больше одного на вопрос
+    - player: имя игрока — очки сессии добавляются в таблицу лидеров
+      (только вместе с session_id: сессия проверяется один раз)
+    """
+    if sheet.player is not None and sheet.session_id is None:
+        raise HTTPException(status_code=400, detail="Очки в таблицу лидеров засчитываются только по сессии")
+    
+    answers = {}
+    for item in sheet.answers:
+        if item.question_id in answers:
+            raise HTTPException(status_code=400, detail="Повторный ответ на вопрос")
+        answers[item.question_id] = item.answer
     
-    return QuizAnswerResponse(
-        is_correct=is_correct,
-        correct_answer=question.correct_answer,
-        explanation=question.explanation,
-        points_earned=question.points if is_correct else 0
+    if sheet.session_id is None:
+        ids = list(answers)
+    else:
+        session = quiz_sessions.get(sheet.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Сессия викторины не найдена или уже завершена")
+        if not answers.keys() <= set(session.question_ids):
+            raise HTTPException(status_code=400, detail="Ответ на вопрос не из этой сессии")
+        if quiz_sessions.close(sheet.session_id) is None:
+            raise HTTPException(status_code=404, detail="Сессия викторины не найдена или уже завершена")
+        ids = list(session.question_ids)
+    
+    key = await get_answer_key_async()
+    if sheet.session_id is None and not all(question_id in key for question_id in ids):
+        raise HTTPException(status_code=404, detail="Вопрос не найден")
+    ids = [question_id for question_id in ids if question_id in key]
+    
+    results = [
+        QuizAnswerResult(
+            question_id=question_id,
+            answer=answers.get(question_id),
+            **key.grade(question_id, answers.get(question_id))
+        )
+        for question_id in ids
+    ]
+    total_points = sum(r.points_earned for r in results)
+    rank = None
+    if sheet.player is not None:
+        # Очки сразу попадают в рейтинг в памяти, в БД — со следующей записью
+        rank, _ = get_leaderboard().add(sheet.player, total_points)
+    return QuizSheetResponse(
+        session_id=sheet.session_id,
+        results=results,
+        correct_count=sum(r.is_correct for r in results),
+        total_points=total_points,
+        max_points=sum(key.question_points(question_id) for question_id in ids),
+        rank=rank
     )
 
 
 # Получить все категории вопросов
 @router.get("/categories")
-def get_quiz_categories(db: Session = Depends(get_db)):
+async def get_quiz_categories():
     """Получить список категорий викторины"""
-    categories = db.query(QuizQuestion.category).distinct().all()
+    if settings.data_mode == "memory":
+        return {"categories": [cat for cat in (await get_store_async()).quiz_categories if cat]}
+    
+    categories = await run_db(
+        lambda db: db.query(QuizQuestion.category).distinct().order_by(QuizQuestion.category).all()
+    )
     return {"categories": [cat[0] for cat in categories if cat[0]]}
\ No newline at end of file
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Query, Response
+from typing import List, Optional
+from app.config import get_settings
+from app.database import run_db
+from app.fragments import encode_json, render_all_async
+from app.memory_store import get_store_async
+from app.models import HistoricalEvent
+from app.projections import load_view
+from app.routers.events import EventCard
+from app.timeline import get_event_timeline_async
+from pydantic import BaseModel
+
+router = APIRouter(prefix="/api/timeline", tags=["timeline"])
+settings = get_settings()
+
+# Лента времени с детализацией по масштабу: окно лет делится на равные отрезки,
+# для каждого — число событий и самые важные из них. Ответ собирается из индекса
+# событий по годам (app/timeline.py), без чтения всех событий окна
+
+# Pydantic схемы
+class TimelineBucket(BaseModel):
+    start_year: int  # Первый год отрезка
+    end_year: int  # Последний год отрезка (включительно)
+    count: int  # Событий в отрезке
+    events: List[EventCard]  # Самые важные события отрезка
+
+class TimelineResponse(BaseModel):
+    from_year: Optional[int]
+    to_year: Optional[int]
+    total: int  # Событий во всём окне
+    buckets: List[TimelineBucket]
+
+
+async def _event_cards(ids: List[int]) -> dict:
+    """Карточки событий по id"""
+    if settings.data_mode == "memory":
+        events = (await get_store_async()).events_by_id
+        return {event_id: events[event_id] for event_id in ids}
+    if not ids:
+        return {}
+
+    def load(db):
+        query = load_view(db.query(HistoricalEvent), HistoricalEvent, EventCard)
+        return {e.id: e for e in query.filter(HistoricalEvent.id.in_(ids))}
+
+    return await run_db(load)
+
+
+# Лента времени по отрезкам
+@router.get("", response_model=TimelineResponse)
+async def get_timeline(
+    from_year: Optional[int] = Query(None, alias="from"),
+    to_year: Optional[int] = Query(None, alias="to"),
+    buckets: int = Query(50, ge=1),
+    top: int = Query(3, ge=0)
+):
+    """
+    Получить плотность событий и самые важные события по отрезкам окна лет
+    - from, to: окно лет, границы включены (по умолчанию — от первого до последнего события)
+    - buckets: на сколько равных отрезков делится окно, не больше timeline_max_buckets
+      (и не больше числа лет в окне)
+    - top: самых важных событий на отрезок, не больше timeline_top_k
+    """
+    timeline = await get_event_timeline_async()
+    if from_year is None:
+        from_year = timeline.years[0] if timeline.years else None
+    if to_year is None:
+        to_year = timeline.years[-1] if timeline.years else None
+
+    parts = []
+    if from_year is not None and to_year is not None and from_year <= to_year:
+        span = to_year - from_year + 1
+        count = min(buckets, settings.timeline_max_buckets, span)
+        for i in range(count):
+            start = from_year + i * span // count
+            end = from_year + (i + 1) * span // count - 1
+            lo, hi = timeline.span(start, end)
+            parts.append((start, end, hi - lo, timeline.top(lo, hi, top) if top else []))
+
+    events = await _event_cards([event_id for *_, ids in parts for event_id in ids])
+    cards = dict(zip(events, await render_all_async(EventCard, events.values())))
+    body = b"".join(
+        [
+            b'{"from_year":', encode_json(from_year),
+            b',"to_year":', encode_json(to_year),
+            b',"total":', encode_json(sum(part[2] for part in parts)),
+            b',"buckets":[',
+        ]
+        + [
+            b",".join(
+                b'{"start_year":%d,"end_year":%d,"count":%d,"events":[' % (start, end, size)
+                + b",".join([cards[event_id] for event_id in ids if event_id in cards])
+                + b"]}"
+                for start, end, size, ids in parts
+            ),
+            b"]}",
+        ]
+    )
+    return Response(content=body, media_type="application/json")
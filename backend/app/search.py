@@ -0,0 +1,176 @@
+import html
+import re
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import false, literal_column, select, text
+from app.dataset import dataset_generation, on_dataset_change, store_if_current
+from app.models import HistoricalEvent, GeographicPoint
+
+# Полнотекстовый поиск на SQLite FTS5.
+# В индекс попадает нормализованный текст (нижний регистр, ё -> е), поэтому
+# "ЕНИСЕЙ", "енисей" и "Берёза"/"береза" находятся одинаково. Нормализация
+# сохраняет длину строки, так что позиции совпадений в индексе совпадают
+# с позициями в исходном тексте — по ним строится подсветка
+
+
+class SearchIndex(NamedTuple):
+    fts_table: str
+    table: object
+    columns: tuple
+    weights: tuple  # Веса колонок для bm25: совпадение в названии важнее
+
+
+SEARCH_INDEXES = {
+    "events": SearchIndex(
+        "historical_events_fts", HistoricalEvent.__table__, ("title", "description"), (10.0, 1.0)
+    ),
+    "points": SearchIndex(
+        "geographic_points_fts", GeographicPoint.__table__, ("name", "description"), (10.0, 1.0)
+    ),
+}
+
+SNIPPET_WIDTH = 200  # Длина фрагмента с подсветкой, символов
+_MARK_START, _MARK_END = "\x02", "\x03"
+
+
+class SearchHit(NamedTuple):
+    id: int
+    rank: float  # bm25: чем меньше, тем релевантнее
+    highlights: tuple  # Нормализованный текст колонок с метками совпадений
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Нижний регистр и ё -> е без изменения длины строки"""
+    if not value:
+        return ""
+    normalized = value.lower().replace("ё", "е")
+    if len(normalized) == len(value):
+        return normalized
+    # Редкие символы меняют длину при lower() — такие оставляем как есть
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in value).replace("ё", "е")
+
+
+def fts_query(query: str) -> Optional[str]:
+    """Запрос FTS5: все слова запроса как префиксы (None, если слов нет)"""
+    words = re.findall(r"\w+", normalize_text(query))
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def rebuild_search_index(conn):
+    """Пересоздать полнотекстовые индексы по данным в БД (вызывается сидером)"""
+    if conn.dialect.name != "sqlite":
+        return
+    for index in SEARCH_INDEXES.values():
+        columns = ", ".join(index.columns)
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {index.fts_table}")
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {index.fts_table} USING fts5("
+            f"{columns}, tokenize='unicode61 remove_diacritics 0')"
+        )
+        rows = conn.execute(select(index.table.c.id, *[index.table.c[c] for c in index.columns]))
+        params = [
+            {"id": row[0], **{c: normalize_text(v) for c, v in zip(index.columns, row[1:])}}
+            for row in rows
+        ]
+        if params:
+            placeholders = ", ".join(f":{c}" for c in index.columns)
+            conn.execute(
+                text(f"INSERT INTO {index.fts_table} (rowid, {columns}) VALUES (:id, {placeholders})"),
+                params
+            )
+
+
+_available: Dict[str, bool] = {}
+
+
+@on_dataset_change
+def _reset_available():
+    _available.clear()
+
+
+def search_available(db, name: str) -> bool:
+    """Есть ли в БД полнотекстовый индекс (его нет, например, в старых снимках)"""
+    available = _available.get(name)
+    if available is None:
+        generation = dataset_generation()
+        available = db.get_bind().dialect.name == "sqlite" and db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+            {"name": SEARCH_INDEXES[name].fts_table}
+        ).first() is not None
+        store_if_current(generation, lambda: _available.__setitem__(name, available))
+    return available
+
+
+def match_ids(name: str, query: str):
+    """SELECT с id записей, подходящих под запрос, — для фильтра column.in_(...)"""
+    index = SEARCH_INDEXES[name]
+    match = fts_query(query)
+    ids = select(literal_column("rowid")).select_from(text(index.fts_table))
+    if match is None:
+        return ids.where(false())
+    return ids.where(text(f"{index.fts_table} MATCH :fts_query")).params(fts_query=match)
+
+
+def search(db, name: str, query: str, limit: int = 20, offset: int = 0) -> List[SearchHit]:
+    """Найти записи, упорядочив их по релевантности (bm25)"""
+    match = fts_query(query)
+    if match is None:
+        return []
+    index = SEARCH_INDEXES[name]
+    weights = ", ".join(str(w) for w in index.weights)
+    highlights = ", ".join(
+        f"highlight({index.fts_table}, {i}, :mark_start, :mark_end)"
+        for i in range(len(index.columns))
+    )
+    rows = db.execute(
+        text(
+            f"SELECT rowid, bm25({index.fts_table}, {weights}) AS rank, {highlights} "
+            f"FROM {index.fts_table} WHERE {index.fts_table} MATCH :fts_query "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        ),
+        {"fts_query": match, "mark_start": _MARK_START, "mark_end": _MARK_END,
+         "limit": limit, "offset": offset}
+    )
+    return [SearchHit(row[0], row[1], tuple(row[2:])) for row in rows]
+
+
+def _spans(highlighted: str):
+    """Позиции совпадений (начало, конец) в тексте без меток"""
+    spans, position, start = [], 0, 0
+    for ch in highlighted or "":
+        if ch == _MARK_START:
+            start = position
+        elif ch == _MARK_END:
+            spans.append((start, position))
+        else:
+            position += 1
+    return spans
+
+
+def snippet(original: Optional[str], highlighted: str, width: int = SNIPPET_WIDTH) -> str:
+    """Фрагмент исходного текста вокруг первого совпадения, совпадения в <b>...</b>"""
+    original = original or ""
+    spans = _spans(highlighted)
+    begin = max(0, spans[0][0] - width // 4) if spans else 0
+    end = min(len(original), begin + width)
+
+    parts = ["…" if begin else ""]
+    cursor = begin
+    for start, stop in spans:
+        if start < cursor or stop > end:
+            continue
+        parts.append(html.escape(original[cursor:start]))
+        parts.append(f"<b>{html.escape(original[start:stop])}</b>")
+        cursor = stop
+    parts.append(html.escape(original[cursor:end]))
+    parts.append("…" if end < len(original) else "")
+    return "".join(parts)
+
+
+def hit_snippet(hit: SearchHit, record, columns) -> str:
+    """Фрагмент для найденной записи: из первой колонки с совпадением, начиная с описания"""
+    for i in reversed(range(len(columns))):
+        if _MARK_START in (hit.highlights[i] or ""):
+            return snippet(getattr(record, columns[i]), hit.highlights[i])
+    return snippet(getattr(record, columns[-1]), "")
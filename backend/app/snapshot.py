@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+from sqlalchemy.engine import make_url
+
+# Готовый снимок БД собирается один раз при сборке (python seed_data.py --snapshot)
+# и при старте копируется на место рабочей БД или открывается только на чтение
+
+def manifest_path(snapshot_path) -> Path:
+    """Путь к манифесту снимка: yenisei.db -> yenisei.manifest.json"""
+    path = Path(snapshot_path)
+    return path.with_name(path.stem + ".manifest.json")
+
+
+def load_manifest(snapshot_path) -> Optional[dict]:
+    """Прочитать манифест снимка (None, если снимок не собран)"""
+    if not snapshot_path:
+        return None
+    manifest = manifest_path(snapshot_path)
+    if not Path(snapshot_path).is_file() or not manifest.is_file():
+        return None
+    return json.loads(manifest.read_text(encoding="utf-8"))
+
+
+def sqlite_path(database_url: str) -> Optional[Path]:
+    """Путь к файлу SQLite из URL (None для других СУБД и БД в памяти)"""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    return Path(url.database)
+
+
+def readonly_url(settings) -> Optional[str]:
+    """URL снимка только на чтение, если включён режим readonly и снимок собран"""
+    if settings.snapshot_mode != "readonly" or load_manifest(settings.snapshot_path) is None:
+        return None
+    # Снимок не меняется, пока его обслуживают, — блокировки SQLite не нужны
+    path = Path(settings.snapshot_path).resolve().as_posix()
+    return f"sqlite:///file:{path}?mode=ro&immutable=1&uri=true"
+
+
+def _stored_hash(path: Path) -> Optional[str]:
+    """Версия данных в существующем файле БД"""
+    try:
+        with closing(sqlite3.connect(f"file:{path.as_posix()}?mode=ro", uri=True)) as conn:
+            row = conn.execute(
+                "SELECT content_hash FROM dataset_version ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def install_snapshot(settings) -> Optional[str]:
+    """
+    Подключить готовый снимок БД вместо заполнения при старте
+    Возвращает "readonly", "copied", "current" (рабочая БД уже совпадает со снимком)
+    или None, если снимка нет
+    """
+    manifest = load_manifest(settings.snapshot_path)
+    if manifest is None:
+        return None
+    if settings.snapshot_mode == "readonly":
+        return "readonly"
+
+    target = sqlite_path(settings.database_url)
+    if target is None:
+        return None
+    if target.exists() and _stored_hash(target) == manifest["content_hash"]:
+        return "current"
+
+    # Старые журналы относятся к прежнему файлу — с новым их применять нельзя
+    for suffix in ("-wal", "-shm", "-journal"):
+        Path(f"{target}{suffix}").unlink(missing_ok=True)
+
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.copyfile(settings.snapshot_path, tmp)
+    os.replace(tmp, target)
+    return "copied"
@@ -0,0 +1,283 @@
+import bisect
+import heapq
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from app import database
+from app.config import get_settings
+from app.dataset import DatasetCache
+from app.memory_store import get_store
+from app.models import GeographicPoint
+
+# Пространственный индекс географических точек для карты.
+# Статические k-d деревья в памяти: по (широта, долгота) — для выборки
+# прямоугольником видимой области страницами по порядку id, и по точкам на
+# единичной сфере (x, y, z) — для поиска ближайших: расстояние по хорде растёт
+# вместе с расстоянием по поверхности Земли, поэтому ближайшие по хорде и есть
+# ближайшие на карте. Деревья строятся для всех точек и отдельно для каждого
+# типа, один раз после заполнения БД
+
+settings = get_settings()
+
+EARTH_RADIUS_KM = 6371.0088
+
+Box = Tuple[Sequence[float], Sequence[float]]  # Прямоугольник: (нижние, верхние) границы по осям
+
+
+class KDTree:
+    """
+    Сбалансированное k-d дерево без указателей: массивы упорядочены так,
+    что корень отрезка [lo, hi) лежит в середине, левое поддерево — до неё,
+    правое — после. Ось разбиения чередуется с глубиной
+    """
+
+    __slots__ = ("dims", "coords", "ids", "min_ids")
+
+    def __init__(self, items: Sequence[Tuple[Tuple[float, ...], int]], dims: int):
+        self.dims = dims
+        coords = [item_coords for item_coords, _ in items]
+        # Сортируются номера элементов по спискам значений осей — без кортежей-ключей
+        axes = [[point[axis] for point in coords] for axis in range(dims)]
+        order = list(range(len(coords)))
+        self._build(order, [values.__getitem__ for values in axes], 0, len(order), 0)
+        self.coords = [coords[i] for i in order]
+        self.ids = [items[i][1] for i in order]
+        self.min_ids = [0] * len(order)  # Наименьший id поддерева — в позиции его корня
+        if order:
+            self._bound_ids(0, len(order))
+
+    def _build(self, order, keys, lo, hi, axis):
+        while hi - lo > 1:
+            order[lo:hi] = sorted(order[lo:hi], key=keys[axis])
+            mid = (lo + hi) // 2
+            axis = (axis + 1) % self.dims
+            self._build(order, keys, lo, mid, axis)
+            lo = mid + 1
+
+    def _bound_ids(self, lo, hi) -> int:
+        mid = (lo + hi) // 2
+        least = self.ids[mid]
+        if lo < mid:
+            least = min(least, self._bound_ids(lo, mid))
+        if mid + 1 < hi:
+            least = min(least, self._bound_ids(mid + 1, hi))
+        self.min_ids[mid] = least
+        return least
+
+    def __len__(self):
+        return len(self.ids)
+
+    def ordered_range(self, boxes: Sequence[Box], limit: int) -> List[int]:
+        """
+        До limit id точек, попавших хотя бы в один прямоугольник (low, high)
+        (границы включены), по возрастанию id. Поддеревья раскрываются в порядке
+        наименьшего id в них, поэтому обход заканчивается на limit-й точке
+        """
+        coords, ids, min_ids = self.coords, self.ids, self.min_ids
+        found = []
+        if not ids or limit <= 0:
+            return found
+        # Поддерево отбрасывается, если разбиение отсекает его от всех прямоугольников
+        lowest = [min(low[axis] for low, _ in boxes) for axis in range(self.dims)]
+        highest = [max(high[axis] for _, high in boxes) for axis in range(self.dims)]
+        # Куча: (наименьший id, поддерево или точка, lo, hi, ось)
+        heap = [(min_ids[len(ids) // 2], True, 0, len(ids), 0)]
+        while heap and len(found) < limit:
+            least, subtree, lo, hi, axis = heapq.heappop(heap)
+            if not subtree:
+                found.append(least)
+                continue
+            mid = (lo + hi) // 2
+            point = coords[mid]
+            if in_boxes(point, boxes):
+                heapq.heappush(heap, (ids[mid], False, mid, mid, axis))
+            value = point[axis]
+            next_axis = (axis + 1) % self.dims
+            if lo < mid and lowest[axis] <= value:
+                heapq.heappush(heap, (min_ids[(lo + mid) // 2], True, lo, mid, next_axis))
+            if mid + 1 < hi and value <= highest[axis]:
+                heapq.heappush(heap, (min_ids[(mid + 1 + hi) // 2], True, mid + 1, hi, next_axis))
+        return found
+
+    def nearest(self, target: Sequence[float], k: int) -> List[Tuple[float, int]]:
+        """k ближайших точек: пары (квадрат расстояния, id) по возрастанию расстояния, затем id"""
+        coords, ids, dims = self.coords, self.ids, self.dims
+        best: List[Tuple[float, int]] = []  # Куча худших: (-квадрат расстояния, -id)
+        if k <= 0:
+            return []
+
+        def visit(lo, hi, axis):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            point = coords[mid]
+            distance = sum((point[i] - target[i]) ** 2 for i in range(dims))
+            entry = (-distance, -ids[mid])
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+            diff = target[axis] - point[axis]
+            next_axis = (axis + 1) % dims
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            visit(*near, next_axis)
+            if len(best) < k or diff * diff <= -best[0][0]:
+                visit(*far, next_axis)
+
+        visit(0, len(ids), 0)
+        return sorted((-distance, -item_id) for distance, item_id in best)
+
+
+class OrderedRangeIndex:
+    """
+    Выборка прямоугольником страницами по возрастанию id (курсор — id последней
+    точки страницы). Точки по порядку id делятся на выровненные отрезки длиной
+    BLOCK·2^j, как узлы дерева отрезков, и у каждого отрезка своё k-d дерево.
+    Точки после курсора — это остаток его блока (проверяется подряд) и O(log n)
+    следующих отрезков растущей длины; деревья обходятся только до limit-й точки,
+    а не собирают и сортируют весь прямоугольник на каждой странице
+    """
+
+    BLOCK = 256
+
+    __slots__ = ("ids", "coords", "trees")
+
+    def __init__(self, items: Sequence[Tuple[Tuple[float, ...], int]], dims: int):
+        items = sorted(items, key=lambda item: item[1])
+        self.ids = [item_id for _, item_id in items]
+        self.coords = [item_coords for item_coords, _ in items]
+        self.trees: Dict[Tuple[int, int], KDTree] = {}  # (начало, длина) -> дерево отрезка
+        size = self.BLOCK
+        while True:
+            for start in range(0, len(items), size):
+                self.trees[start, size] = KDTree(items[start:start + size], dims)
+            if size >= len(items):
+                break
+            size *= 2
+
+    def page(self, boxes: Sequence[Box], after: Optional[int], limit: int) -> List[int]:
+        """До limit id точек в прямоугольниках с id больше after, по возрастанию id"""
+        ids, coords, total = self.ids, self.coords, len(self.ids)
+        start = 0 if after is None else bisect.bisect_right(ids, after)
+        found = []
+        # Остаток блока курсора — подряд: точки уже идут по id
+        edge = min(-(-start // self.BLOCK) * self.BLOCK, total)
+        for i in range(start, edge):
+            if len(found) >= limit:
+                return found
+            if in_boxes(coords[i], boxes):
+                found.append(ids[i])
+        # Дальше отрезки растут вдвое: густо заполненный прямоугольник набирает
+        # страницу в небольших деревьях, редкий обходит O(log n) деревьев
+        start, cap = edge, self.BLOCK
+        while start < total and len(found) < limit:
+            size = self.BLOCK
+            while size < cap and start % (size * 2) == 0:
+                size *= 2
+            found += self.trees[start, size].ordered_range(boxes, limit - len(found))
+            start += size
+            cap *= 2
+        return found
+
+
+def in_boxes(point: Sequence[float], boxes: Sequence[Box]) -> bool:
+    """Точка внутри хотя бы одного прямоугольника (low, high), границы включены"""
+    for low, high in boxes:
+        for i, value in enumerate(point):
+            if not low[i] <= value <= high[i]:
+                break
+        else:
+            return True
+    return False
+
+
+def bbox_ranges(south: float, west: float, north: float, east: float):
+    """
+    Прямоугольник карты как пары (нижняя, верхняя) границ по (широта, долгота).
+    Если west > east, прямоугольник пересекает 180-й меридиан — две части
+    """
+    if south > north:
+        return []
+    if west <= east:
+        return [((south, west), (north, east))]
+    return [((south, west), (north, 180.0)), ((south, -180.0), (north, east))]
+
+
+def to_sphere(latitude: float, longitude: float) -> Tuple[float, float, float]:
+    """Точка на единичной сфере"""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(squared_chord: float) -> float:
+    """Расстояние по поверхности Земли (км) по квадрату хорды единичной сферы"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+class SpatialIndex:
+    """Деревья по типу точки (ключ None — все точки)"""
+
+    __slots__ = ("flat", "sphere")
+
+    def __init__(self, rows):
+        groups: Dict[Optional[str], list] = {}
+        for point_id, point_type, latitude, longitude in rows:
+            for key in {None, point_type}:
+                groups.setdefault(key, []).append((point_id, latitude, longitude))
+        self.flat: Dict[Optional[str], OrderedRangeIndex] = {
+            key: OrderedRangeIndex([((lat, lon), point_id) for point_id, lat, lon in points], 2)
+            for key, points in groups.items()
+        }
+        self.sphere: Dict[Optional[str], KDTree] = {
+            key: KDTree([(to_sphere(lat, lon), point_id) for point_id, lat, lon in points], 3)
+            for key, points in groups.items()
+        }
+
+    def bbox(self, south: float, west: float, north: float, east: float, limit: int,
+             point_type: Optional[str] = None, after: Optional[int] = None) -> List[int]:
+        """
+        Страница id точек в прямоугольнике: до limit точек с id больше after,
+        по возрастанию id. Если west > east, прямоугольник пересекает 180-й меридиан
+        """
+        index = self.flat.get(point_type or None)
+        boxes = bbox_ranges(south, west, north, east)
+        if index is None or not boxes:
+            return []
+        return index.page(boxes, after, limit)
+
+    def near(self, latitude: float, longitude: float, k: int,
+             point_type: Optional[str] = None) -> List[Tuple[int, float]]:
+        """k ближайших точек: пары (id, расстояние в км), ближайшие первыми"""
+        tree = self.sphere.get(point_type or None)
+        if tree is None:
+            return []
+        return [
+            (point_id, chord_to_km(distance))
+            for distance, point_id in tree.nearest(to_sphere(latitude, longitude), k)
+        ]
+
+
+def _load_rows():
+    if settings.data_mode == "memory":
+        return [(p.id, p.type, p.latitude, p.longitude) for p in get_store().points]
+    with database.engine.connect() as conn:
+        return conn.execute(
+            select(
+                GeographicPoint.id, GeographicPoint.type,
+                GeographicPoint.latitude, GeographicPoint.longitude
+            ).order_by(GeographicPoint.id)
+        ).all()
+
+
+_index = DatasetCache(lambda: SpatialIndex(_load_rows()))
+
+
+def get_spatial_index() -> SpatialIndex:
+    """Пространственный индекс; строится при первом обращении после заполнения БД"""
+    return _index.get()
+
+
+async def get_spatial_index_async() -> SpatialIndex:
+    """Пространственный индекс для асинхронного обработчика: строится в пуле потоков"""
+    return await _index.get_async()
@@ -0,0 +1,161 @@
+import bisect
+import heapq
+import math
+from typing import List, NamedTuple, Optional, Tuple
+from sqlalchemy import select
+from app import database
+from app.config import get_settings
+from app.dataset import DatasetCache
+from app.memory_store import get_store
+from app.models import Epoch, HistoricalEvent
+
+# Индексы ленты времени, построенные один раз после заполнения БД.
+# Эпохи: границы всех эпох делят ось лет на отрезки, внутри которых набор
+# эпох не меняется; для каждого отрезка заранее записаны покрывающие его эпохи.
+# Вопрос "какие эпохи идут в году N" — двоичный поиск отрезка по границам.
+# События: массив событий по годам и дерево отрезков над ним, в каждом узле
+# которого — самые важные события его отрезка. Число событий в любом окне лет —
+# два двоичных поиска, самые важные события окна — слияние O(log n) узлов
+
+settings = get_settings()
+
+
+class EpochIntervals:
+    """Эпохи по отрезкам лет между их границами"""
+
+    __slots__ = ("bounds", "covering")
+
+    def __init__(self, rows):
+        # Эпоха занимает годы [start_year, end_year] включительно; без границы — не ограничена.
+        # Порядок отображения — по order_index (NULL раньше), затем по id
+        intervals = sorted(
+            (
+                (order_index is not None, order_index or 0, epoch_id),
+                start_year if start_year is not None else -math.inf,
+                end_year + 1 if end_year is not None else math.inf,
+            )
+            for epoch_id, start_year, end_year, order_index in rows
+        )
+        self.bounds = sorted({start for _, start, _ in intervals} | {end for _, _, end in intervals})
+        self.covering: List[Tuple[int, ...]] = [
+            tuple(order[2] for order, start, end in intervals if start <= bound < end)
+            for bound in self.bounds
+        ]
+
+    def at(self, year: int) -> Tuple[int, ...]:
+        """id эпох, в которые входит год, в порядке отображения"""
+        i = bisect.bisect_right(self.bounds, year) - 1
+        return self.covering[i] if i >= 0 else ()
+
+
+def _load_epoch_rows():
+    if settings.data_mode == "memory":
+        return [(e.id, e.start_year, e.end_year, e.order_index) for e in get_store().epochs]
+    with database.engine.connect() as conn:
+        return conn.execute(
+            select(Epoch.id, Epoch.start_year, Epoch.end_year, Epoch.order_index)
+            .order_by(Epoch.id)
+        ).all()
+
+
+_epochs = DatasetCache(lambda: EpochIntervals(_load_epoch_rows()))
+
+
+def get_epoch_intervals() -> EpochIntervals:
+    """Индекс эпох по годам; строится при первом обращении после заполнения БД"""
+    return _epochs.get()
+
+
+async def get_epoch_intervals_async() -> EpochIntervals:
+    """Индекс эпох по годам для асинхронного обработчика: строится в пуле потоков"""
+    return await _epochs.get_async()
+
+
+def year_slice(events, keys, from_year: Optional[int] = None, to_year: Optional[int] = None):
+    """
+    События с годом в [from_year, to_year] и их ключи из последовательности в порядке
+    ленты. keys — ключи порядка ленты (memory_store.event_order) параллельно events:
+    границы ищутся по ним двоичным поиском, без перебора.
+    Если задана хотя бы одна граница, события без года не входят (как в SQL)
+    """
+    if from_year is None and to_year is None:
+        return events, keys
+    # Ключ события — ((есть год, год), id): кортеж без id меньше всех ключей своего года
+    lo = bisect.bisect_left(keys, ((True, from_year if from_year is not None else -math.inf),))
+    hi = bisect.bisect_right(keys, ((True, to_year), math.inf)) if to_year is not None else len(keys)
+    return events[lo:hi], keys[lo:hi]
+
+
+class TimelineEntry(NamedTuple):
+    rank: tuple  # Порядок важности: (-importance, год, id)
+    id: int
+
+
+class EventTimeline:
+    """
+    События с годом в порядке (год, id) и дерево отрезков над ними:
+    узел хранит до top_k самых важных событий своего отрезка
+    """
+
+    __slots__ = ("top_k", "years", "tree", "size")
+
+    def __init__(self, rows, top_k: int):
+        # rows: (id, год, важность) в порядке (год, id), только события с годом
+        self.top_k = top_k
+        self.years = [year for _, year, _ in rows]
+        self.size = len(rows)
+        self.tree: List[Tuple[TimelineEntry, ...]] = [()] * (2 * self.size)
+        for i, (event_id, year, importance) in enumerate(rows):
+            self.tree[self.size + i] = (TimelineEntry((-(importance or 0), year, event_id), event_id),)
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = self._merge(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def _merge(self, *parts) -> Tuple[TimelineEntry, ...]:
+        return tuple(heapq.nsmallest(self.top_k, heapq.merge(*parts)))
+
+    def span(self, from_year: int, to_year: int) -> Tuple[int, int]:
+        """Отрезок [lo, hi) массива событий с годом в [from_year, to_year]"""
+        return (
+            bisect.bisect_left(self.years, from_year),
+            bisect.bisect_right(self.years, to_year),
+        )
+
+    def top(self, lo: int, hi: int, k: int) -> List[int]:
+        """id k самых важных событий отрезка [lo, hi) массива; при равной важности — более ранние"""
+        parts = []
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                parts.append(self.tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                parts.append(self.tree[hi])
+            lo >>= 1
+            hi >>= 1
+        return [entry.id for entry in heapq.nsmallest(min(k, self.top_k), heapq.merge(*parts))]
+
+
+def _load_event_rows():
+    if settings.data_mode == "memory":
+        return [(e.id, e.year, e.importance) for e in get_store().events if e.year is not None]
+    with database.engine.connect() as conn:
+        return conn.execute(
+            select(HistoricalEvent.id, HistoricalEvent.year, HistoricalEvent.importance)
+            .where(HistoricalEvent.year.isnot(None))
+            .order_by(HistoricalEvent.year, HistoricalEvent.id)
+        ).all()
+
+
+_events = DatasetCache(lambda: EventTimeline(_load_event_rows(), settings.timeline_top_k))
+
+
+def get_event_timeline() -> EventTimeline:
+    """Индекс событий по годам; строится после заполнения БД или при первом обращении"""
+    return _events.get()
+
+
+async def get_event_timeline_async() -> EventTimeline:
+    """Индекс событий по годам для асинхронного обработчика (строится в пуле потоков)"""
+    return await _events.get_async()
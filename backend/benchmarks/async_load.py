@@ -0,0 +1,132 @@
+"""
+Нагрузка на API при разных размерах пула потоков для запросов к БД (threadpool_size)
+
+Запуск из каталога backend:
+    python -m benchmarks.async_load --concurrency 200 --seconds 10 --extra-events 20000 --threadpool-sizes 10,40,100
+
+Для каждого размера пула запускается отдельный сервер uvicorn на свежесобранной БД
+с выключенным кэшем ответов (каждый запрос доходит до БД); клиенты
+одновременно запрашивают типичные эндпоинты списков.
+
+Keep-alive сервера длиннее таймаута клиента: при перегрузке ответ ждёт дольше
+5 с (keep-alive uvicorn по умолчанию), и uvicorn 0.23 закрывает по таймеру
+соединение, по которому уже отправляет следующий ответ (LocalProtocolError
+в логе сервера, "Server disconnected" у клиента) — это не ошибки БД.
+Ошибки выводятся по видам
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+import httpx
+from seed_data import build_snapshot
+
+PATHS = [
+    lambda: f"/api/events/?epoch_id={random.randint(1, 5)}&limit=50&view=card",
+    lambda: f"/api/events/{random.randint(1, 1000)}",
+    lambda: "/api/events/important/top",
+    lambda: f"/api/geography/?type={random.choice(['city', 'landmark', 'nature'])}",
+    lambda: "/api/quiz/questions/random?count=10",
+    lambda: "/api/epochs/",
+]
+
+CLIENT_TIMEOUT = 30  # Секунд на ответ
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path: Path, port: int, threadpool_size: int):
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path.as_posix()}",
+        SNAPSHOT_PATH="",
+        DATA_MODE="sql",
+        THREADPOOL_SIZE=str(threadpool_size),
+        RESPONSE_CACHE_MAX_ENTRIES="0",
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+            "--timeout-keep-alive", str(CLIENT_TIMEOUT * 2),
+        ],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Сервер не запустился")
+
+
+async def load(port: int, concurrency: int, seconds: float):
+    """Нагрузить сервер; вернуть (запросов в секунду, p50 мс, p95 мс, ошибки по видам)"""
+    latencies, errors = [], Counter()
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=CLIENT_TIMEOUT) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(random.choice(PATHS)())
+                    if response.status_code >= 500:
+                        errors[f"HTTP {response.status_code}"] += 1
+                        continue
+                except httpx.HTTPError as e:
+                    errors[type(e).__name__] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    return len(latencies) / seconds, statistics.median(latencies or [0]) * 1000, p95 * 1000, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--extra-events", type=int, default=20000)
+    parser.add_argument("--threadpool-sizes", default="10,40,100", help="размеры пула через запятую")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.threadpool_sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "load.db"
+        print(f"📦 Сборка тестовой БД ({args.extra_events} доп. событий)...")
+        build_snapshot(db_path, args.extra_events)
+
+        print(f"{'потоков':<8}{'запросов/с':>12}{'p50, мс':>10}{'p95, мс':>10}{'ошибок':>9}")
+        for size in sizes:
+            port = free_port()
+            server = start_server(db_path, port, size)
+            try:
+                qps, p50, p95, errors = asyncio.run(load(port, args.concurrency, args.seconds))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{size:<8}{qps:>12,.0f}{p50:>10.2f}{p95:>10.2f}{sum(errors.values()):>9}")
+            for kind, count in errors.most_common():
+                print(f"{'':<8}{kind}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Проверка ответов викторины: строка вопроса из БД против ключа ответов в памяти
+
+Запуск из каталога backend:
+    python -m benchmarks.grading --answers 20000
+
+Всё в одном потоке, поэтому результат — пропускная способность одного ядра.
+"строка из БД" — прежний check_answer: сессия, запрос полной строки вопроса
+по id, сравнение буквы. "ключ ответов" — app.answer_key. Результаты проверки
+обоими способами должны совпадать
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app import database
+from app.answer_key import AnswerKey
+from app.models import QuizQuestion
+from seed_data import build_snapshot
+
+
+def grade_by_row(engine, question_id, answer):
+    with Session(engine) as db:
+        question = db.query(QuizQuestion).filter(QuizQuestion.id == question_id).first()
+        is_correct = question.correct_answer.upper() == answer.upper()
+        return dict(
+            is_correct=is_correct,
+            correct_answer=question.correct_answer,
+            explanation=question.explanation,
+            points_earned=question.points if is_correct else 0
+        )
+
+
+def timed(grade, answers):
+    """Проверок в секунду и мкс на проверку"""
+    started = time.perf_counter()
+    for question_id, answer in answers:
+        grade(question_id, answer)
+    elapsed = time.perf_counter() - started
+    return len(answers) / elapsed, elapsed / len(answers) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--answers", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "grading.db"
+        print("📦 Сборка тестовой БД...")
+        build_snapshot(path, 0)
+        engine = database.make_engine(f"sqlite:///{path.as_posix()}")
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(
+                    QuizQuestion.id, QuizQuestion.correct_answer,
+                    QuizQuestion.points, QuizQuestion.explanation
+                ).order_by(QuizQuestion.id)
+            ).all()
+
+        started = time.perf_counter()
+        key = AnswerKey(rows)
+        built = (time.perf_counter() - started) * 1000
+
+        ids = [row[0] for row in rows]
+        answers = [(random.choice(ids), random.choice("ABCD")) for _ in range(args.answers)]
+        identical = all(
+            grade_by_row(engine, question_id, answer) == key.grade(question_id, answer)
+            for question_id, answer in answers[:500]
+        )
+
+        print(f"Вопросов: {len(key)}, ключ построен за {built:.2f} мс, "
+              f"объяснения: {len(key.explanations)} байт")
+        print(f"{'способ':<16}{'проверок/с':>14}{'мкс на проверку':>18}")
+        baseline, baseline_us = timed(lambda q, a: grade_by_row(engine, q, a), answers)
+        print(f"{'строка из БД':<16}{baseline:>14,.0f}{baseline_us:>18.2f}")
+        fast, fast_us = timed(key.grade, answers)
+        print(f"{'ключ ответов':<16}{fast:>14,.0f}{fast_us:>18.2f}")
+        print(f"Ускорение: {fast / baseline:.0f}x, результаты совпадают: {'✅' if identical else '❌'}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
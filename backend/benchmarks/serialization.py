@@ -0,0 +1,86 @@
+"""
+Сериализация списков: обычный response_model против готовых JSON-фрагментов
+
+Запуск из каталога backend:
+    python -m benchmarks.serialization --extra-events 5000 --repeat 50
+
+Для каждого случая сравниваются время кодирования ответа (записи уже загружены
+из БД) и сами байты ответа — они должны совпадать
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy.orm import Session, selectinload
+from app import database, fragments
+from app.models import Epoch, HistoricalEvent, GeographicPoint
+from app.routers.epochs import EpochWithEvents
+from app.routers.events import EventResponse
+from app.routers.geography import GeographicPointResponse
+from seed_data import build_snapshot
+
+
+def pydantic_body(schema, records) -> bytes:
+    """Ответ так, как его строит FastAPI для response_model=List[schema]"""
+    field = create_response_field(name="response", type_=List[schema])
+    content = asyncio.run(serialize_response(field=field, response_content=records))
+    return JSONResponse(content).body
+
+
+def fragments_body(schema, records) -> bytes:
+    return fragments.list_response(schema, records).body
+
+
+def timed(render, schema, records, repeat, before=None):
+    """Среднее время одного ответа, мс"""
+    total = 0.0
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        render(schema, records)
+        total += time.perf_counter() - started
+    return total / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--extra-events", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "serialization.db"
+        print(f"📦 Сборка тестовой БД ({args.extra_events} доп. событий)...")
+        build_snapshot(path, args.extra_events)
+        engine = database.make_engine(f"sqlite:///{path.as_posix()}")
+        with Session(engine) as db:
+            cases = [
+                ("events, 100", EventResponse,
+                 db.query(HistoricalEvent).order_by(HistoricalEvent.year).limit(100).all()),
+                ("events, все", EventResponse,
+                 db.query(HistoricalEvent).order_by(HistoricalEvent.year).all()),
+                ("epochs+events", EpochWithEvents,
+                 db.query(Epoch).options(selectinload(Epoch.events)).order_by(Epoch.order_index).all()),
+                ("geography", GeographicPointResponse, db.query(GeographicPoint).all()),
+            ]
+
+            print(f"{'ответ':<16}{'записей':>9}{'pydantic, мс':>14}{'фрагменты (первый), мс':>24}"
+                  f"{'фрагменты, мс':>15}{'ускорение':>11}{'байты':>8}")
+            for name, schema, records in cases:
+                identical = pydantic_body(schema, records) == fragments_body(schema, records)
+                baseline = timed(pydantic_body, schema, records, args.repeat)
+                cold = timed(fragments_body, schema, records, args.repeat, before=fragments._reset_fragments)
+                warm = timed(fragments_body, schema, records, args.repeat)
+                print(f"{name:<16}{len(records):>9}{baseline:>14.2f}{cold:>24.2f}{warm:>15.3f}"
+                      f"{baseline / warm:>10.0f}x{'  ✅' if identical else '  ❌':>8}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Сравнение профилей SQLite ("default" и "tuned") под конкурентной нагрузкой
+
+Запуск из каталога backend:
+    python -m benchmarks.sqlite_profile --threads 16 --seconds 5 --extra-events 20000
+
+Каждый профиль читает одну и ту же свежесобранную БД несколькими потоками
+(типичные запросы роутеров), пока один поток пишет в отдельную таблицу
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from sqlalchemy import text
+from app import database
+from seed_data import build_snapshot
+
+READ_QUERIES = [
+    ("SELECT * FROM historical_events WHERE epoch_id = :value ORDER BY year LIMIT 100", lambda: random.randint(1, 5)),
+    ("SELECT * FROM historical_events WHERE id = :value", lambda: random.randint(1, 1000)),
+    ("SELECT * FROM historical_events ORDER BY importance DESC LIMIT 10", lambda: 0),
+    ("SELECT * FROM geographic_points WHERE type = :value", lambda: random.choice(["city", "landmark", "nature"])),
+    ("SELECT * FROM quiz_questions WHERE difficulty = :value", lambda: random.choice(["easy", "medium", "hard"])),
+]
+
+
+def run_profile(url, profile, threads, seconds, pool_size, with_writer):
+    """Нагрузить БД в заданном профиле; вернуть (запросов в секунду, p50 мс, p95 мс, ошибок)"""
+    engine = database.make_engine(url, profile=profile, pool_size=pool_size)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS bench_writes (id INTEGER PRIMARY KEY, value TEXT)"))
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+
+    def reader():
+        local = []
+        while time.perf_counter() < deadline:
+            sql, value = random.choice(READ_QUERIES)
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text(sql), {"value": value()}).fetchall()
+            except Exception as e:
+                errors.append(e)
+                continue
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    def writer():
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("INSERT INTO bench_writes (value) VALUES (:value)"), {"value": "x" * 100})
+            except Exception as e:
+                errors.append(e)
+            time.sleep(0.005)
+
+    workers = [threading.Thread(target=reader) for _ in range(threads)]
+    if with_writer:
+        workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    engine.dispose()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    return len(latencies) / seconds, statistics.median(latencies or [0]) * 1000, p95 * 1000, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--extra-events", type=int, default=20000)
+    parser.add_argument("--no-writer", action="store_true", help="только чтение, без параллельной записи")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"📦 Сборка тестовой БД ({args.extra_events} доп. событий)...")
+        cases = [
+            ("default", 0),  # как было: без PRAGMA и без пула соединений
+            ("tuned", database.settings.db_pool_size or 5),
+        ]
+        print(f"{'профиль':<10}{'запросов/с':>12}{'p50, мс':>10}{'p95, мс':>10}{'ошибок':>9}")
+        for profile, pool_size in cases:
+            # Каждому профилю — своя копия, чтобы режим журнала не переходил между прогонами
+            path = Path(tmp) / f"{profile}.db"
+            build_snapshot(path, args.extra_events)
+            qps, p50, p95, errors = run_profile(
+                f"sqlite:///{path.as_posix()}", profile, args.threads,
+                args.seconds, pool_size, not args.no_writer
+            )
+            print(f"{profile:<10}{qps:>12,.0f}{p50:>10.2f}{p95:>10.2f}{errors:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Проверка планов запросов: ни один GET-эндпоинт не должен читать таблицы
+полным перебором, а сортировка во временном B-дереве допустима только
+для строк, уже отобранных по индексу
+
+Скрипт собирает свежую БД во временном каталоге, вызывает все GET-маршруты
+приложения (в том числе новые — их не нужно перечислять вручную), перехватывает
+каждый выполненный SELECT и прогоняет его через EXPLAIN QUERY PLAN.
+Код возврата 1, если найдено нарушение — удобно для CI:
+
+    python check_query_plans.py
+"""
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+# Значения для параметров маршрутов, чтобы задействовать все фильтры
+SAMPLE_PARAMS = {
+    "epoch_id": 1,
+    "event_id": 1,
+    "point_id": 1,
+    "image_id": 1,
+    "type": "city",
+    "category": "nature",
+    "difficulty": "easy",
+    "featured": "true",
+    "search": "енисей",
+    "query": "енисей",
+    "q": "енисей",
+    "include": "events",
+    "cursor": "WzE4MDAsMV0",  # Курсор событий: (1800, 1)
+    "view": "card",
+    "year": 1800, "from_year": 1700, "to_year": 1900,
+    "from": 1600, "to": 2000, "buckets": 20,
+    "south": 50, "west": 85, "north": 60, "east": 95,  # Прямоугольник на карте
+    "lat": 56.0, "lon": 92.9,  # Красноярск
+    "zoom": 5,
+}
+
+# Запросы, которым полный перебор разрешён осознанно (с причиной)
+ALLOWED = [
+    (re.compile(r"ORDER BY random\(\)", re.I), "случайная выборка"),
+    (re.compile(r"FROM sqlite_master", re.I), "служебная таблица SQLite"),
+]
+
+# Перебор без индекса допустим только для чтения таблицы целиком, без условий
+_PLAIN_SCAN = re.compile(r"\bSCAN (\w+)\b(?! VIRTUAL)(?!.*USING)")
+# Шаги, которые отбирают строки по индексу (в том числе MATCH полнотекстового индекса)
+_INDEXED = re.compile(r"\bSEARCH \w+|VIRTUAL TABLE INDEX \d+:M")
+
+
+def plan_violations(conn, statement, parameters):
+    """Нарушения в плане одного запроса"""
+    plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    # Сортировка без временного B-дерева означает чтение в порядке первичного ключа
+    filtered = re.search(r"\b(WHERE|GROUP BY)\b", statement, re.I)
+    narrowed = any(_INDEXED.search(step) for step in plan)
+    violations = []
+    for step in plan:
+        if "USE TEMP B-TREE" in step and not narrowed:
+            violations.append(step)
+        elif _PLAIN_SCAN.search(step) and filtered:
+            violations.append(step)
+    return plan, violations
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    db_path = Path(tmp) / "plans.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path.as_posix()}"
+    os.environ["SNAPSHOT_PATH"] = ""
+    os.environ["DATA_MODE"] = "sql"
+    os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"  # Каждый запрос должен дойти до БД
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main as app_main
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app import database
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(database.engine, "before_cursor_execute", capture)
+    client = TestClient(app_main.app)
+
+    routes = [
+        route for route in app_main.app.routes
+        if "GET" in getattr(route, "methods", ()) and route.path.startswith("/api/")
+        and route.path not in ("/api/reseed",)
+    ]
+    for route in routes:
+        path = re.sub(r"{(\w+)}", lambda m: str(SAMPLE_PARAMS.get(m.group(1), 1)), route.path)
+        client.get(path)
+        client.get(path, params={
+            name: value for name, value in SAMPLE_PARAMS.items() if f"{{{name}}}" not in route.path
+        })
+    event.remove(database.engine, "before_cursor_execute", capture)
+
+    failures = 0
+    seen = set()
+    with database.engine.connect() as conn:
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            reason = next((why for pattern, why in ALLOWED if pattern.search(statement)), None)
+            plan, violations = plan_violations(conn, statement, parameters)
+            if violations and not reason:
+                failures += 1
+                print("❌", " ".join(statement.split()))
+                for step in plan:
+                    print("     ", step)
+            elif violations:
+                print(f"⚪ разрешено ({reason}):", " ".join(statement.split())[:100])
+
+    print(f"\nПроверено маршрутов: {len(routes)}, запросов: {len(seen)}, нарушений: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
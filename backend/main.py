@@ -1,24 +1,52 @@
+import anyio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
+from app.snapshot import install_snapshot, load_manifest
 from app.database import engine, Base, SessionLocal
-from app.routers import epochs, events, geography, gallery, quiz, facts
-from app.models import Epoch
+from app.http_cache import conditional_get
+from app.response_cache import cached_response, response_cache
+from app.memory_store import get_store
+from app.migrations import migrate
+from app.pagination import NEXT_CURSOR_HEADER
+from app.reseed import remove_stale_shadows, reseed_status, start_reseed, warm_caches
+from app.dataset import pin_dataset_generation, stop_watching, watch_dataset
+from app.leaderboard import get_leaderboard, start_flusher, stop_flusher
+from app.routers import epochs, events, geography, gallery, quiz, facts, bootstrap, timeline, leaderboard
+from app.models import Epoch, SCHEMA_VERSION
 
 # Получаем настройки
 settings = get_settings()
 
-# Создаем таблицы в базе данных
-Base.metadata.create_all(bind=engine)
-
-# Всегда пересоздаём базу данных при старте (на бесплатном Render она сбрасывается)
+# Заполняем базу при старте, только если версия данных в ней устарела
+# (на бесплатном Render файл БД сбрасывается, тогда данные загрузятся заново)
 def init_db():
     print("🌊 Инициализация базы данных...")
     from seed_data import main as seed_main
     seed_main()
     print("✅ База данных готова!")
 
-init_db()
+# Если собран готовый снимок БД (python seed_data.py --snapshot), берём данные из него
+snapshot_status = install_snapshot(settings)
+if snapshot_status == "readonly":
+    print(f"📦 База данных открыта только на чтение из снимка {settings.snapshot_path}")
+    if load_manifest(settings.snapshot_path).get("schema_version") != SCHEMA_VERSION:
+        print("⚠️  Снимок собран для другой версии схемы — пересоберите его: python seed_data.py --snapshot")
+else:
+    # Теневые копии от прерванного пересоздания БД больше не нужны
+    remove_stale_shadows()
+    # Создаем таблицы и доводим схему существующей БД до текущей версии (индексы)
+    if migrate(engine):
+        print(f"🛠️  Схема базы данных обновлена до версии {SCHEMA_VERSION}")
+    if snapshot_status:
+        print(f"📦 База данных загружена из снимка {settings.snapshot_path}")
+    else:
+        init_db()
+
+# В режиме memory загружаем весь набор данных сразу, а не на первом запросе
+if settings.data_mode == "memory":
+    get_store()
 
 # Инициализируем FastAPI приложение
 app = FastAPI(
@@ -27,15 +55,57 @@ app = FastAPI(
     description="API для приложения 'История реки Енисей'"
 )
 
-# Настройка CORS для фронтенда
+# Поколение данных на время запроса: построенное по данным, прочитанным
+# до пересоздания БД, не попадает в кэши и индексы после него
+app.middleware("http")(pin_dataset_generation)
+
+# Кэш готовых ответов: повторный одинаковый запрос не доходит до БД
+app.middleware("http")(cached_response)
+
+# ETag и Last-Modified по версии данных: повторные запросы получают 304
+app.middleware("http")(conditional_get)
+
+# Настройка CORS для фронтенда (добавлена последней — обрабатывает запрос первой)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Размер пула потоков для синхронной работы (запросы к БД, ответы кэша при сжатии)
+@app.on_event("startup")
+def configure_threadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+
+# Пересоздание БД в другом воркере сбрасывает данные в памяти и в этом
+@app.on_event("startup")
+def start_dataset_watch():
+    watch_dataset()
+
+@app.on_event("shutdown")
+def stop_dataset_watch():
+    stop_watching()
+
+# Индексы карты, ленты времени и викторины строятся при старте в пуле потоков,
+# как после пересоздания БД, а не на первом запросе
+@app.on_event("startup")
+async def warm_dataset_caches():
+    await run_in_threadpool(warm_caches)
+
+# Таблица лидеров: загружается при старте, новые очки пишутся в БД в фоне
+# пачками, а оставшиеся — при остановке
+@app.on_event("startup")
+def start_leaderboard():
+    get_leaderboard()
+    start_flusher()
+
+@app.on_event("shutdown")
+def stop_leaderboard():
+    stop_flusher()
+
 # Подключаем роутеры
 app.include_router(epochs.router)
 app.include_router(events.router)
@@ -43,6 +113,9 @@ app.include_router(geography.router)
 app.include_router(gallery.router)
 app.include_router(quiz.router)
 app.include_router(facts.router)
+app.include_router(bootstrap.router)
+app.include_router(timeline.router)
+app.include_router(leaderboard.router)
 
 # Корневой эндпоинт
 @app.get("/")
@@ -61,13 +134,30 @@ def health_check():
 # Эндпоинт для пересоздания базы данных
 @app.get("/api/reseed")
 def reseed_database():
-    """Пересоздать базу данных с новыми данными"""
-    try:
-        from seed_data import main as seed_main
-        seed_main()
-        return {"status": "ok", "message": "База данных пересоздана!"}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+    """
+    Пересоздать базу данных с новыми данными.
+    Заполнение идёт в фоне в теневую копию, рабочая БД продолжает отвечать,
+    затем копия переносится в рабочий файл; ход выполнения — в /api/reseed/status
+    """
+    if snapshot_status == "readonly":
+        return {"status": "error", "message": "База данных открыта только на чтение из снимка"}
+    if settings.sqlite_immutable:
+        return {"status": "error", "message": "База данных открыта как неизменяемая (SQLITE_IMMUTABLE)"}
+    if not start_reseed():
+        return {"status": "running", "message": "Пересоздание уже выполняется", "progress": reseed_status()}
+    return {"status": "ok", "message": "Пересоздание базы данных запущено", "progress": reseed_status()}
+
+# Ход пересоздания базы данных
+@app.get("/api/reseed/status")
+def reseed_database_status():
+    """Состояние последнего пересоздания базы данных"""
+    return reseed_status()
+
+# Статистика кэша ответов
+@app.get("/api/cache/stats")
+def response_cache_stats():
+    """Попадания, промахи и размер кэша ответов"""
+    return response_cache.stats()
 
 
 # Точка входа для запуска
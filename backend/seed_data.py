@@ -1,20 +1,200 @@
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine, Base
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.schema import CreateTable
+from app.config import get_settings
+from app import database
+from app.database import Base
+from app.dataset import dataset_changed
+from app.migrations import mark_schema_version
+from app.reseed import load_via_shadow
+from app.search import rebuild_search_index
 from app.models import (
     Epoch, HistoricalEvent, GeographicPoint, 
-    GalleryImage, QuizQuestion, InterestingFact
+    GalleryImage, QuizQuestion, InterestingFact, DatasetVersion, SCHEMA_VERSION
 )
+from app.snapshot import manifest_path, sqlite_path
 
-def clear_database():
-    """Очистить все таблицы"""
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    print("✅ База данных очищена и пересоздана")
+# Подписи таблиц для отчёта о загрузке
+TABLE_LABELS = {
+    Epoch: "Эпох",
+    HistoricalEvent: "Событий",
+    GeographicPoint: "Географических точек",
+    GalleryImage: "Изображений",
+    QuizQuestion: "Вопросов",
+    InterestingFact: "Фактов",
+}
 
-def seed_epochs(db: Session):
-    """Создать исторические эпохи"""
+# Ослабленные настройки SQLite на время загрузки: журнал в памяти и без fsync.
+# Только для нового файла, который ещё никто не читает (теневая копия, снимок):
+# сбой посреди загрузки может его испортить. После загрузки прежние значения возвращаются
+BULK_LOAD_PRAGMAS = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -65536,
+}
+
+def dataset_hash(dataset):
+    """Хэш набора данных: схема всех таблиц плюс содержимое всех строк"""
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(database.engine)).encode("utf-8"))
+    for model, rows in dataset:
+        digest.update(model.__tablename__.encode("utf-8"))
+        digest.update(json.dumps(rows, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+def stored_dataset_hash(bind=None):
+    """Хэш набора данных, который уже лежит в БД (None, если БД не заполнена)"""
+    bind = bind or database.engine
+    if not inspect(bind).has_table(DatasetVersion.__tablename__):
+        return None
+    with bind.connect() as conn:
+        return conn.execute(
+            select(DatasetVersion.content_hash).order_by(DatasetVersion.id.desc()).limit(1)
+        ).scalar()
+
+def build_dataset(extra_events: int = 0):
+    """
+    Собрать весь набор данных в виде строк для вставки
+    - extra_events: сколько синтетических событий добавить (для стенда)
+    Возвращает список пар (модель, строки) в порядке загрузки
+    """
+    epochs = _with_ids(epochs_data())
+    events = historical_events_data(epochs)
+    if extra_events:
+        events += synthetic_events_data(epochs, events, extra_events)
+    
+    return [
+        (Epoch, epochs),
+        (HistoricalEvent, _with_ids(events)),
+        (GeographicPoint, _with_ids(geographic_points_data())),
+        (GalleryImage, _with_ids(gallery_data())),
+        (QuizQuestion, _with_ids(quiz_questions_data())),
+        (InterestingFact, _with_ids(interesting_facts_data())),
+    ]
+
+def _with_ids(rows):
+    """Проставить строкам id по порядку — так же, как их назначила бы БД"""
+    for row_id, row in enumerate(rows, start=1):
+        row["id"] = row_id
+    return rows
+
+def _complete_rows(table, rows):
+    """Дополнить строки значениями по умолчанию: executemany нужен одинаковый набор колонок"""
+    defaults = {}
+    for column in table.columns:
+        if column.default is None:
+            defaults[column.name] = None
+        elif column.default.is_callable:
+            defaults[column.name] = column.default.arg(None)
+        else:
+            defaults[column.name] = column.default.arg
+    return [{**defaults, **row} for row in rows]
+
+@contextmanager
+def relaxed_pragmas(conn):
+    """Временно ослабить гарантии SQLite ради скорости массовой загрузки"""
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    
+    saved = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in BULK_LOAD_PRAGMAS}
+    for name, value in BULK_LOAD_PRAGMAS.items():
+        conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+
+def load_dataset(bind, dataset, content_hash, progress=None, bulk=False):
+    """
+    Заменить данные во всех таблицах набором данных одной транзакцией
+    через executemany на уровне Core, минуя unit of work ORM
+    - progress: необязательная функция progress(модель, загружено_таблиц, всего_таблиц)
+    - bulk: ослабить настройки SQLite (BULK_LOAD_PRAGMAS) — только для нового файла
+    Возвращает отчёт: список (модель, число строк, секунды)
+    """
+    report = []
+    with bind.connect() as conn, (relaxed_pragmas(conn) if bulk else nullcontext()):
+        with conn.begin():
+            Base.metadata.create_all(conn)
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+            mark_schema_version(conn)
+            
+            for model, rows in dataset:
+                started = time.perf_counter()
+                if rows:
+                    conn.execute(model.__table__.insert(), _complete_rows(model.__table__, rows))
+                report.append((model, len(rows), time.perf_counter() - started))
+                if progress:
+                    progress(model, len(report), len(dataset))
+            
+            # Полнотекстовый поиск строится по только что загруженным строкам
+            rebuild_search_index(conn)
+            
+            # Запоминаем версию данных — при следующем старте заполнение будет пропущено
+            conn.execute(
+                DatasetVersion.__table__.insert(),
+                {"content_hash": content_hash, "seeded_at": datetime.utcnow()}
+            )
+    return report
+
+def build_snapshot(path, extra_events: int = 0):
+    """
+    Собрать готовый снимок БД для деплоя: заполнить, проанализировать (ANALYZE),
+    сжать (VACUUM) и записать рядом манифест с хэшами и количеством строк
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    
+    dataset = build_dataset(extra_events)
+    content_hash = dataset_hash(dataset)
+    snapshot_engine = create_engine(f"sqlite:///{tmp.as_posix()}")
+    try:
+        report = load_dataset(snapshot_engine, dataset, content_hash, bulk=True)
+        with snapshot_engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("VACUUM")
+    finally:
+        snapshot_engine.dispose()
+    os.replace(tmp, path)
+    
+    manifest = {
+        "content_hash": content_hash,
+        "file_sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+        "schema_version": SCHEMA_VERSION,
+        "row_counts": {model.__tablename__: len(rows) for model, rows in dataset},
+        "built_at": datetime.utcnow().isoformat(timespec="seconds"),
+    }
+    manifest_path(path).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return report
+
+def print_report(report):
+    """Вывести отчёт о загрузке по каждой таблице"""
+    print(f"\n📊 Статистика:")
+    for model, count, seconds in report:
+        rate = count / seconds if seconds else 0
+        print(f"   • {TABLE_LABELS[model]}: {count} за {seconds:.3f} с ({rate:,.0f} строк/с)")
+    total = sum(seconds for _, _, seconds in report)
+    print(f"   Всего: {sum(count for _, count, _ in report)} строк за {total:.3f} с")
+
+def epochs_data():
+    """Исторические эпохи"""
     epochs = [
-        Epoch(
+        dict(
             name="Древний период и палеолит",
             start_year=-30000,
             end_year=1500,
@@ -22,7 +202,7 @@ def seed_epochs(db: Session):
             color="#8B4513",
             order_index=1
         ),
-        Epoch(
+        dict(
             name="Эпоха русских первопроходцев",
             start_year=1600,
             end_year=1750,
@@ -30,7 +210,7 @@ def seed_epochs(db: Session):
             color="#D97706",
             order_index=2
         ),
-        Epoch(
+        dict(
             name="Золотая лихорадка и индустриализация",
             start_year=1750,
             end_year=1917,
@@ -38,7 +218,7 @@ def seed_epochs(db: Session):
             color="#F59E0B",
             order_index=3
         ),
-        Epoch(
+        dict(
             name="Советский период",
             start_year=1917,
             end_year=1991,
@@ -46,7 +226,7 @@ def seed_epochs(db: Session):
             color="#EF4444",
             order_index=4
         ),
-        Epoch(
+        dict(
             name="Современная эпоха",
             start_year=1991,
             end_year=2026,
@@ -56,17 +236,14 @@ def seed_epochs(db: Session):
         )
     ]
     
-    db.add_all(epochs)
-    db.commit()
-    print(f"✅ Добавлено {len(epochs)} эпох")
     return epochs
 
-def seed_historical_events(db: Session, epochs):
-    """Создать исторические события"""
+def historical_events_data(epochs):
+    """Исторические события (epochs — строки эпох с уже назначенными id)"""
     events = [
         # Древний период
-        HistoricalEvent(
-            epoch_id=epochs[0].id,
+        dict(
+            epoch_id=epochs[0]["id"],
             title="Стоянка Афонтова Гора",
             year=-20000,
             date_description="около 20000 лет до н.э.",
@@ -76,8 +253,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Афонтова Гора во всем своем величии",
             importance=9
         ),
-        HistoricalEvent(
-            epoch_id=epochs[0].id,
+        dict(
+            epoch_id=epochs[0]["id"],
             title="Петроглифы Шалаболинской писаницы",
             year=-3000,
             date_description="3-е тысячелетие до н.э.",
@@ -87,8 +264,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Петроглифы на скалах Енисея",
             importance=8
         ),
-        HistoricalEvent(
-            epoch_id=epochs[0].id,
+        dict(
+            epoch_id=epochs[0]["id"],
             title="Поселения хакасов и кетов",
             year=500,
             date_description="V-XV века н.э.",
@@ -100,8 +277,8 @@ def seed_historical_events(db: Session, epochs):
         ),
         
         # Эпоха первопроходцев
-        HistoricalEvent(
-            epoch_id=epochs[1].id,
+        dict(
+            epoch_id=epochs[1]["id"],
             title="Основание Енисейска",
             year=1619,
             date_description="1619 год",
@@ -111,8 +288,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Историческая реконструкция острога",
             importance=10
         ),
-        HistoricalEvent(
-            epoch_id=epochs[1].id,
+        dict(
+            epoch_id=epochs[1]["id"],
             title="Экспедиция Семёна Дежнёва",
             year=1648,
             date_description="1648 год",
@@ -122,8 +299,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Северные просторы Сибири",
             importance=9
         ),
-        HistoricalEvent(
-            epoch_id=epochs[1].id,
+        dict(
+            epoch_id=epochs[1]["id"],
             title="Основание Красноярского острога",
             year=1628,
             date_description="1628 год",
@@ -135,8 +312,8 @@ def seed_historical_events(db: Session, epochs):
         ),
         
         # Золотая лихорадка
-        HistoricalEvent(
-            epoch_id=epochs[2].id,
+        dict(
+            epoch_id=epochs[2]["id"],
             title="Открытие золота в Енисейской тайге",
             year=1830,
             date_description="1830-е годы",
@@ -146,8 +323,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Золотые прииски Сибири",
             importance=8
         ),
-        HistoricalEvent(
-            epoch_id=epochs[2].id,
+        dict(
+            epoch_id=epochs[2]["id"],
             title="Развитие пароходства",
             year=1863,
             date_description="1863 год",
@@ -157,8 +334,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Пароход на сибирской реке",
             importance=7
         ),
-        HistoricalEvent(
-            epoch_id=epochs[2].id,
+        dict(
+            epoch_id=epochs[2]["id"],
             title="Строительство Транссибирской магистрали",
             year=1895,
             date_description="1895 год",
@@ -170,8 +347,8 @@ def seed_historical_events(db: Session, epochs):
         ),
         
         # Советский период
-        HistoricalEvent(
-            epoch_id=epochs[3].id,
+        dict(
+            epoch_id=epochs[3]["id"],
             title="Открытие Норильского месторождения",
             year=1921,
             date_description="1921 год",
@@ -181,8 +358,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Место открытия норильских богатств",
             importance=9
         ),
-        HistoricalEvent(
-            epoch_id=epochs[3].id,
+        dict(
+            epoch_id=epochs[3]["id"],
             title="Строительство Красноярской ГЭС",
             year=1955,
             date_description="1955-1972 годы",
@@ -192,8 +369,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Плотина Красноярской ГЭС",
             importance=10
         ),
-        HistoricalEvent(
-            epoch_id=epochs[3].id,
+        dict(
+            epoch_id=epochs[3]["id"],
             title="Саяно-Шушенская ГЭС",
             year=1963,
             date_description="1963-1985 годы",
@@ -203,8 +380,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Грандиозная плотина в Саянах",
             importance=10
         ),
-        HistoricalEvent(
-            epoch_id=epochs[3].id,
+        dict(
+            epoch_id=epochs[3]["id"],
             title="Красноярск-26 (Железногорск)",
             year=1950,
             date_description="1950 год",
@@ -216,8 +393,8 @@ def seed_historical_events(db: Session, epochs):
         ),
         
         # Современная эпоха
-        HistoricalEvent(
-            epoch_id=epochs[4].id,
+        dict(
+            epoch_id=epochs[4]["id"],
             title="Экологические проблемы Енисея",
             year=1995,
             date_description="1990-е годы",
@@ -227,8 +404,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Экология Енисея требует внимания",
             importance=7
         ),
-        HistoricalEvent(
-            epoch_id=epochs[4].id,
+        dict(
+            epoch_id=epochs[4]["id"],
             title="Развитие туризма на Енисее",
             year=2000,
             date_description="2000-е годы",
@@ -238,8 +415,8 @@ def seed_historical_events(db: Session, epochs):
             image_caption="Туризм на Енисее",
             importance=6
         ),
-        HistoricalEvent(
-            epoch_id=epochs[4].id,
+        dict(
+            epoch_id=epochs[4]["id"],
             title="Енисей в XXI веке",
             year=2020,
             date_description="2020-е годы",
@@ -251,15 +428,13 @@ def seed_historical_events(db: Session, epochs):
         )
     ]
     
-    db.add_all(events)
-    db.commit()
-    print(f"✅ Добавлено {len(events)} исторических событий")
+    return events
 
-def seed_geographic_points(db: Session):
-    """Создать географические точки"""
+def geographic_points_data():
+    """Географические точки"""
     points = [
         # Города
-        GeographicPoint(
+        dict(
             name="Кызыл",
             type="city",
             latitude=51.7191,
@@ -272,7 +447,7 @@ def seed_geographic_points(db: Session):
             icon="city",
             color="#EF4444"
         ),
-        GeographicPoint(
+        dict(
             name="Абакан",
             type="city",
             latitude=53.7215,
@@ -285,7 +460,7 @@ def seed_geographic_points(db: Session):
             icon="city",
             color="#EF4444"
         ),
-        GeographicPoint(
+        dict(
             name="Красноярск",
             type="city",
             latitude=56.0153,
@@ -298,7 +473,7 @@ def seed_geographic_points(db: Session):
             icon="city",
             color="#DC2626"
         ),
-        GeographicPoint(
+        dict(
             name="Дивногорск",
             type="city",
             latitude=55.9572,
@@ -311,7 +486,7 @@ def seed_geographic_points(db: Session):
             icon="city",
             color="#F97316"
         ),
-        GeographicPoint(
+        dict(
             name="Енисейск",
             type="city",
             latitude=58.4494,
@@ -324,7 +499,7 @@ def seed_geographic_points(db: Session):
             icon="city",
             color="#F59E0B"
         ),
-        GeographicPoint(
+        dict(
             name="Лесосибирск",
             type="city",
             latitude=58.2343,
@@ -337,7 +512,7 @@ def seed_geographic_points(db: Session):
             icon="city",
             color="#F97316"
         ),
-        GeographicPoint(
+        dict(
             name="Игарка",
             type="city",
             latitude=67.4667,
@@ -350,7 +525,7 @@ def seed_geographic_points(db: Session):
             icon="city",
             color="#3B82F6"
         ),
-        GeographicPoint(
+        dict(
             name="Дудинка",
             type="city",
             latitude=69.4056,
@@ -365,7 +540,7 @@ def seed_geographic_points(db: Session):
         ),
         
         # Природные достопримечательности
-        GeographicPoint(
+        dict(
             name="Национальный парк 'Красноярские Столбы'",
             type="nature",
             latitude=55.9333,
@@ -376,7 +551,7 @@ def seed_geographic_points(db: Session):
             icon="mountain",
             color="#10B981"
         ),
-        GeographicPoint(
+        dict(
             name="Саяны",
             type="nature",
             latitude=52.0,
@@ -387,7 +562,7 @@ def seed_geographic_points(db: Session):
             icon="mountain",
             color="#059669"
         ),
-        GeographicPoint(
+        dict(
             name="Плато Путорана",
             type="nature",
             latitude=69.0,
@@ -400,7 +575,7 @@ def seed_geographic_points(db: Session):
         ),
         
         # Исторические места
-        GeographicPoint(
+        dict(
             name="Красноярская ГЭС",
             type="landmark",
             latitude=55.9622,
@@ -411,7 +586,7 @@ def seed_geographic_points(db: Session):
             icon="landmark",
             color="#8B5CF6"
         ),
-        GeographicPoint(
+        dict(
             name="Шалаболинская писаница",
             type="historical",
             latitude=55.7,
@@ -424,14 +599,12 @@ def seed_geographic_points(db: Session):
         )
     ]
     
-    db.add_all(points)
-    db.commit()
-    print(f"✅ Добавлено {len(points)} географических точек")
+    return points
 
-def seed_gallery(db: Session):
-    """Создать галерею изображений"""
+def gallery_data():
+    """Галерея изображений"""
     images = [
-        GalleryImage(
+        dict(
             title="Енисей в Саянах",
             description="Живописный каньон Енисея в горах Саяны. Бирюзовая вода, отвесные скалы и девственная тайга.",
             image_url="https://avatars.mds.yandex.net/i?id=ba4a200c3736ff5ef4675a2388dacc85_l-5221937-images-thumbs&n=13",
@@ -442,7 +615,7 @@ def seed_gallery(db: Session):
             order_index=1,
             is_featured=True
         ),
-        GalleryImage(
+        dict(
             title="Закат на Енисее",
             description="Золотой закат окрашивает воды Енисея в багряные тона. Силуэты деревьев на берегу.",
             image_url="https://avatars.mds.yandex.net/i?id=cb4e505e996b622945ef17e14e90a07592c4ab23-5859366-images-thumbs&n=13",
@@ -453,7 +626,7 @@ def seed_gallery(db: Session):
             order_index=2,
             is_featured=True
         ),
-        GalleryImage(
+        dict(
             title="Ледоход на Енисее",
             description="Мощный ледоход — величественное и опасное явление. Тысячи тонн льда движутся по реке.",
             image_url="https://avatars.mds.yandex.net/i?id=dfe64e84e11b540d76240c8cb9b2058f23a87dcd-5869577-images-thumbs&n=13",
@@ -464,7 +637,7 @@ def seed_gallery(db: Session):
             order_index=3,
             is_featured=False
         ),
-        GalleryImage(
+        dict(
             title="Красноярские Столбы",
             description="Знаменитые скалы-столбы — символ Красноярского края. Любимое место скалолазов и туристов.",
             image_url="https://avatars.mds.yandex.net/i?id=8f12817324aae9531d2949278f394d3e8fd9e499-5339694-images-thumbs&n=13",
@@ -475,7 +648,7 @@ def seed_gallery(db: Session):
             order_index=4,
             is_featured=True
         ),
-        GalleryImage(
+        dict(
             title="Енисей зимой",
             description="Зимний Енисей в Красноярске. Река не замерзает благодаря сбросу теплой воды с ГЭС.",
             image_url="https://avatars.mds.yandex.net/i?id=18d58671577e911aa7031c5ab3be7b46674a5259-5889153-images-thumbs&n=13",
@@ -486,7 +659,7 @@ def seed_gallery(db: Session):
             order_index=5,
             is_featured=False
         ),
-        GalleryImage(
+        dict(
             title="Коммунальный мост",
             description="Знаменитый вантовый мост через Енисей в Красноярске. Символ города на 10-рублевой купюре.",
             image_url="https://avatars.mds.yandex.net/i?id=9a4c2ab6a8dd0afe8eca94545598a85a059ff9a0-5233017-images-thumbs&n=13",
@@ -497,7 +670,7 @@ def seed_gallery(db: Session):
             order_index=6,
             is_featured=False
         ),
-        GalleryImage(
+        dict(
             title="Северное сияние над Енисеем",
             description="Магическое северное сияние танцует над водами Енисея за Полярным кругом.",
             image_url="https://avatars.mds.yandex.net/i?id=44d750bc5ae86eb38d392756841dfd8dc71f4443-5206243-images-thumbs&n=13",
@@ -508,7 +681,7 @@ def seed_gallery(db: Session):
             order_index=7,
             is_featured=True
         ),
-        GalleryImage(
+        dict(
             title="Сибирская тайга",
             description="Бескрайняя тайга вдоль берегов Енисея. Одна из последних диких территорий планеты.",
             image_url="https://avatars.mds.yandex.net/i?id=89573bd618afb04efb9295d07691e770f5faf8a0-5231332-images-thumbs&n=13",
@@ -521,15 +694,13 @@ def seed_gallery(db: Session):
         )
     ]
     
-    db.add_all(images)
-    db.commit()
-    print(f"✅ Добавлено {len(images)} изображений в галерею")
+    return images
 
-def seed_quiz_questions(db: Session):
-    """Создать вопросы викторины"""
+def quiz_questions_data():
+    """Вопросы викторины"""
     questions = [
         # География и рекорды (1-10)
-        QuizQuestion(
+        dict(
             question="Где берет начало Енисей?",
             option_a="Слияние Большого и Малого Енисея",
             option_b="Озеро Байкал",
@@ -541,7 +712,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="В какой океан впадает река?",
             option_a="Северный Ледовитый",
             option_b="Тихий",
@@ -553,7 +724,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какое море принимает воды Енисея?",
             option_a="Карское",
             option_b="Лаптевых",
@@ -565,7 +736,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какое место по длине занимает Енисей среди всех рек России?",
             option_a="1-е место",
             option_b="2-е место",
@@ -577,7 +748,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="В каком городе находится обелиск «Центр Азии»?",
             option_a="Кызыл",
             option_b="Красноярск",
@@ -589,7 +760,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какая река является самым мощным притоком Енисея?",
             option_a="Ангара",
             option_b="Подкаменная Тунгуска",
@@ -601,7 +772,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Как называется залив, в который впадает Енисей?",
             option_a="Енисейский залив",
             option_b="Обская губа",
@@ -613,7 +784,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Через сколько часовых поясов протекает Енисей?",
             option_a="1 пояс",
             option_b="3 пояса",
@@ -625,7 +796,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Является ли Енисей природной границей между Западной и Восточной Сибирью?",
             option_a="Да",
             option_b="Нет",
@@ -637,7 +808,7 @@ def seed_quiz_questions(db: Session):
             category="geography",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какое водохранилище на Енисее называют «Красноярским морем»?",
             option_a="Красноярское",
             option_b="Саяно-Шушенское",
@@ -651,7 +822,7 @@ def seed_quiz_questions(db: Session):
         ),
         
         # История и освоение (11-20)
-        QuizQuestion(
+        dict(
             question="Как переводится название «Ионесси» с древнетунгусского?",
             option_a="Большая вода",
             option_b="Быстрый поток",
@@ -663,7 +834,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=15
         ),
-        QuizQuestion(
+        dict(
             question="В каком году был основан Енисейск, «отец городов сибирских»?",
             option_a="1619",
             option_b="1720",
@@ -675,7 +846,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Кто возглавил экспедицию, заложившую Красноярский острог?",
             option_a="Андрей Дубенский",
             option_b="Семен Дежнев",
@@ -687,7 +858,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Как назывался первый пароход, появившийся на Енисее в 1863 году?",
             option_a="«Енисей»",
             option_b="«Сибирь»",
@@ -699,7 +870,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какое событие 1908 года произошло в бассейне притока Енисея?",
             option_a="Падение Тунгусского метеорита",
             option_b="Открытие золотых приисков",
@@ -711,7 +882,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="В каком городе находится знаменитый Музей вечной мерзлоты?",
             option_a="Игарка",
             option_b="Норильск",
@@ -723,7 +894,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какое судно-музей навечно пришвартовано в Красноярске?",
             option_a="Пароход «Святитель Николай»",
             option_b="Крейсер «Аврора»",
@@ -735,7 +906,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Для чего в XVII веке использовался Енисей в первую очередь?",
             option_a="Сбор ясака (пушнины)",
             option_b="Добыча нефти",
@@ -747,7 +918,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Как назывались традиционные деревянные лодки первопроходцев?",
             option_a="Кочи",
             option_b="Бриги",
@@ -759,7 +930,7 @@ def seed_quiz_questions(db: Session):
             category="history",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какой город на Енисее был крупнейшим центром золотодобычи в XIX веке?",
             option_a="Енисейск",
             option_b="Диксон",
@@ -773,7 +944,7 @@ def seed_quiz_questions(db: Session):
         ),
         
         # Природа и экология (21-30)
-        QuizQuestion(
+        dict(
             question="Какая ценная рыба Енисея занесена в Красную книгу?",
             option_a="Сибирский осетр",
             option_b="Окунь",
@@ -785,7 +956,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Как называется знаменитый заповедник на правом берегу Енисея?",
             option_a="Столбы",
             option_b="Тайга",
@@ -797,7 +968,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какое животное является символом приенисейской тайги?",
             option_a="Бурый медведь",
             option_b="Амурский тигр",
@@ -809,7 +980,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Водятся ли в низовьях Енисея морские млекопитающие?",
             option_a="Да, белуха и нерпа",
             option_b="Нет, только речная рыба",
@@ -821,7 +992,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какое дерево составляет основу «темнохвойной тайги» Енисея?",
             option_a="Кедр и пихта",
             option_b="Береза и осина",
@@ -833,7 +1004,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Замерзает ли Енисей в черте Красноярска зимой?",
             option_a="Нет, из-за работы ГЭС",
             option_b="Да, лед очень толстый",
@@ -845,7 +1016,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=15
         ),
-        QuizQuestion(
+        dict(
             question="Какая птица прилетает в дельту Енисея на гнездование?",
             option_a="Краснозобая казарка",
             option_b="Попугай",
@@ -857,7 +1028,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какое уникальное природное явление можно наблюдать на севере Енисея?",
             option_a="Северное сияние",
             option_b="Песчаные бури",
@@ -869,7 +1040,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Как называется самый северный порт Енисея?",
             option_a="Диксон",
             option_b="Дудинка",
@@ -881,7 +1052,7 @@ def seed_quiz_questions(db: Session):
             category="ecology",
             points=10
         ),
-        QuizQuestion(
+        dict(
             question="Какая ягода считается «царицей» енисейских болот?",
             option_a="Клюква",
             option_b="Клубника",
@@ -895,77 +1066,75 @@ def seed_quiz_questions(db: Session):
         )
     ]
     
-    db.add_all(questions)
-    db.commit()
-    print(f"✅ Добавлено {len(questions)} вопросов викторины")
+    return questions
 
-def seed_interesting_facts(db: Session):
-    """Создать интересные факты"""
+def interesting_facts_data():
+    """Интересные факты"""
     facts = [
-        InterestingFact(
+        dict(
             title="Енисей — самая полноводная река России",
             fact="Енисей сбрасывает в Карское море около 600 км³ воды в год — больше, чем любая другая река России. Это примерно в 3 раза больше, чем Волга!",
             category="nature",
             icon="droplet",
             order_index=1
         ),
-        InterestingFact(
+        dict(
             title="Граница Западной и Восточной Сибири",
             fact="Енисей служит условной границей между Западной Сибирью (к западу) и Восточной Сибирью (к востоку). Меняется даже ландшафт: на западе — равнины, на востоке — горы и возвышенности.",
             category="geography",
             icon="map",
             order_index=2
         ),
-        InterestingFact(
+        dict(
             title="Енисей не замерзает в Красноярске",
             fact="Участок Енисея ниже Красноярской ГЭС не замерзает даже в 40-градусные морозы! Теплая вода с электростанции создает незамерзающую полынью протяженностью более 200 км.",
             category="nature",
             icon="snowflake",
             order_index=3
         ),
-        InterestingFact(
+        dict(
             title="На дне Енисея лежит атомный реактор",
             fact="В 1967 году у поселка Атаманово в Енисей был сброшен отработавший ядерный реактор с ледокола. Он до сих пор лежит на дне под толщей ила и контролируется специалистами.",
             category="history",
             icon="alert-triangle",
             order_index=4
         ),
-        InterestingFact(
+        dict(
             title="Енисей на 10-рублевой купюре",
             fact="Красноярская ГЭС и Коммунальный мост через Енисей изображены на российской купюре достоинством 10 рублей. Это единственная река, представленная на современных российских деньгах.",
             category="culture",
             icon="banknote",
             order_index=5
         ),
-        InterestingFact(
+        dict(
             title="Самая северная река мира",
             fact="Енисей — самая северная из великих рек планеты. Его устье находится за 70° северной широты, в зоне вечной мерзлоты и тундры.",
             category="geography",
             icon="compass",
             order_index=6
         ),
-        InterestingFact(
+        dict(
             title="Енисейский мост — чудо инженерии",
             fact="Железнодорожный мост через Енисей в Красноярске (построен в 1899 году) получил Гран-при на Всемирной выставке в Париже в 1900 году наравне с Эйфелевой башней!",
             category="history",
             icon="award",
             order_index=7
         ),
-        InterestingFact(
+        dict(
             title="В Енисее водится 42 вида рыб",
             fact="В водах Енисея обитает 42 вида рыб, включая осетра, стерлядь, нельму, муксуна, тайменя. Некоторые виды занесены в Красную книгу.",
             category="ecology",
             icon="fish",
             order_index=8
         ),
-        InterestingFact(
+        dict(
             title="Разница температур — 100 градусов!",
             fact="В верховьях Енисея летом вода прогревается до +20°C, а в устье даже летом редко теплее +8°C. Зимой разница температур воздуха от истока до устья может превышать 100 градусов!",
             category="nature",
             icon="thermometer",
             order_index=9
         ),
-        InterestingFact(
+        dict(
             title="Енисей старше динозавров",
             fact="Возраст речной долины Енисея оценивается более чем в 50 миллионов лет. Река текла здесь еще до появления человека на Земле.",
             category="nature",
@@ -974,59 +1143,76 @@ def seed_interesting_facts(db: Session):
         )
     ]
     
-    db.add_all(facts)
-    db.commit()
-    print(f"✅ Добавлено {len(facts)} интересных фактов")
+    return facts
 
-def main():
-    """Главная функция для запуска заполнения БД"""
+def synthetic_events_data(epochs, events, count):
+    """Синтетические события на основе настоящих — для проверки под нагрузкой"""
+    rng = random.Random(count)
+    rows = []
+    for number in range(1, count + 1):
+        template = events[number % len(events)]
+        epoch = epochs[rng.randrange(len(epochs))]
+        year = rng.randint(epoch["start_year"], epoch["end_year"])
+        rows.append(dict(
+            template,
+            epoch_id=epoch["id"],
+            title=f"{template['title']} (#{number})",
+            year=year,
+            date_description=f"{year} год",
+            importance=rng.randint(1, 10),
+        ))
+    return rows
+
+def main(force: bool = False, extra_events: int = None):
+    """
+    Главная функция для запуска заполнения БД
+    - force: пересоздать данные, даже если версия в БД совпадает
+    - extra_events: число синтетических событий (по умолчанию из настроек)
+    Файл SQLite заполняется через теневую копию (app.reseed.load_via_shadow):
+    рабочую БД может в это время читать сервер. Ошибка загрузки
+    (например, БД занята) передаётся вызывающему
+    Возвращает True, если база была заполнена заново
+    """
+    if extra_events is None:
+        extra_events = get_settings().seed_extra_events
+    
+    dataset = build_dataset(extra_events)
+    content_hash = dataset_hash(dataset)
+    if not force and stored_dataset_hash() == content_hash:
+        print(f"✅ Данные в БД актуальны (версия {content_hash[:12]}), заполнение пропущено")
+        return False
+    
     print("=" * 50)
     print("🌊 ЗАПОЛНЕНИЕ БАЗЫ ДАННЫХ 'ИСТОРИЯ ЕНИСЕЯ' 🌊")
     print("=" * 50)
     
-    # Очищаем базу
-    clear_database()
+    live_path = sqlite_path(get_settings().database_url)
+    if live_path is not None:
+        report = load_via_shadow(live_path, dataset, content_hash)
+    else:
+        # Теневую копию можно сделать только для файла SQLite — заполняем на месте
+        report = load_dataset(database.engine, dataset, content_hash)
     
-    # Создаем сессию
-    db = SessionLocal()
+    # Сбрасываем всё, что было построено по прежним данным
+    dataset_changed()
     
-    try:
-        # Заполняем данными
-        print("\n📚 Создание эпох...")
-        epochs = seed_epochs(db)
-        
-        print("\n📖 Создание исторических событий...")
-        seed_historical_events(db, epochs)
-        
-        print("\n🗺️  Создание географических точек...")
-        seed_geographic_points(db)
-        
-        print("\n🖼️  Создание галереи...")
-        seed_gallery(db)
-        
-        print("\n❓ Создание вопросов викторины...")
-        seed_quiz_questions(db)
-        
-        print("\n💡 Создание интересных фактов...")
-        seed_interesting_facts(db)
-        
-        print("\n" + "=" * 50)
-        print("✅ БАЗА ДАННЫХ УСПЕШНО ЗАПОЛНЕНА!")
-        print("=" * 50)
-        print(f"\n📊 Статистика:")
-        print(f"   • Эпох: {db.query(Epoch).count()}")
-        print(f"   • Событий: {db.query(HistoricalEvent).count()}")
-        print(f"   • Географических точек: {db.query(GeographicPoint).count()}")
-        print(f"   • Изображений: {db.query(GalleryImage).count()}")
-        print(f"   • Вопросов: {db.query(QuizQuestion).count()}")
-        print(f"   • Фактов: {db.query(InterestingFact).count()}")
-        print("\n🚀 Запустите сервер: python main.py")
-        
-    except Exception as e:
-        print(f"\n❌ Ошибка: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    print("\n" + "=" * 50)
+    print("✅ БАЗА ДАННЫХ УСПЕШНО ЗАПОЛНЕНА!")
+    print("=" * 50)
+    print_report(report)
+    print("\n🚀 Запустите сервер: python main.py")
+    return True
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Заполнение базы данных 'История Енисея'")
+    parser.add_argument("--force", action="store_true", help="пересоздать данные, даже если они актуальны")
+    parser.add_argument("--extra-events", type=int, default=None, help="добавить N синтетических событий")
+    parser.add_argument("--snapshot", metavar="PATH", help="собрать готовый снимок БД для деплоя вместо заполнения рабочей БД")
+    args = parser.parse_args()
+    
+    if args.snapshot:
+        print(f"📦 Сборка снимка БД {args.snapshot}...")
+        print_report(build_snapshot(args.snapshot, args.extra_events or 0))
+        print(f"✅ Снимок и манифест {manifest_path(args.snapshot)} готовы")
+    else:
+        main(force=args.force, extra_events=args.extra_events)
\ No newline at end of file
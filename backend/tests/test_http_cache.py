@@ -0,0 +1,23 @@
+from starlette.requests import Request
+from app.http_cache import request_key
+
+
+def make_request(query: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/events/",
+        "query_string": query.encode("ascii"),
+        "headers": [],
+    })
+
+
+def test_request_key_keeps_encoded_separators():
+    # "skip=5" внутри значения поиска и отдельный параметр skip — разные запросы
+    encoded = make_request("search=%D0%B5%D0%BD%D0%B8%D1%81%D0%B5%D0%B9%26skip%3D5")
+    separate = make_request("search=%D0%B5%D0%BD%D0%B8%D1%81%D0%B5%D0%B9&skip=5")
+    assert request_key(encoded) != request_key(separate)
+
+
+def test_request_key_ignores_parameter_order():
+    assert request_key(make_request("skip=5&limit=10")) == request_key(make_request("limit=10&skip=5"))
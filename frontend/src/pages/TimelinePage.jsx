@@ -1,7 +1,7 @@
 import { useEffect, useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { Calendar, ChevronDown, ChevronUp, Info } from 'lucide-react';
-import { getEpochs, getEpochWithEvents } from '../services/api';
+import { getTimeline } from '../services/api';
 
 const TimelinePage = () => {
   const [epochs, setEpochs] = useState([]);
@@ -15,10 +15,11 @@ const TimelinePage = () => {
 
   const loadEpochs = async () => {
     try {
-      const response = await getEpochs();
+      // Вся лента времени (эпохи вместе с событиями) одним запросом
+      const response = await getTimeline();
       setEpochs(response.data);
       if (response.data.length > 0) {
-        loadEpochEvents(response.data[0].id);
+        setSelectedEpoch(response.data[0]);
       }
     } catch (error) {
       console.error('Ошибка загрузки эпох:', error);
@@ -27,14 +28,9 @@ const TimelinePage = () => {
     }
   };
 
-  const loadEpochEvents = async (epochId) => {
-    try {
-      const response = await getEpochWithEvents(epochId);
-      setSelectedEpoch(response.data);
-      setExpandedEvent(null);
-    } catch (error) {
-      console.error('Ошибка загрузки событий:', error);
-    }
+  const loadEpochEvents = (epochId) => {
+    setSelectedEpoch(epochs.find((epoch) => epoch.id === epochId) || null);
+    setExpandedEvent(null);
   };
 
   if (loading) {
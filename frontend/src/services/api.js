@@ -9,9 +9,19 @@ const api = axios.create({
   },
 });
 
+// Данные для первой загрузки одним запросом; version — из прошлого ответа
+// (если данные не изменились, придёт { version, changed: false } без данных)
+export const getBootstrap = (version = null) =>
+  api.get('/bootstrap', { params: version ? { version } : {} });
+
 // Эпохи
 export const getEpochs = () => api.get('/epochs/');
 export const getEpochWithEvents = (epochId) => api.get(`/epochs/${epochId}`);
+export const getTimeline = () => api.get('/epochs/', { params: { include: 'events' } });
+export const getEpochsAtYear = (year) => api.get(`/epochs/at/${year}`);
+// Плотность событий и самые важные события по отрезкам окна лет
+// params: { from, to, buckets, top }
+export const getTimelineBuckets = (params = {}) => api.get('/timeline', { params });
 
 // События
 export const getAllEvents = (params = {}) => api.get('/events/', { params });
@@ -24,6 +34,14 @@ export const getGeographicPoints = (type = null) =>
   api.get('/geography/', { params: type ? { type } : {} });
 export const getGeographicPoint = (pointId) => api.get(`/geography/${pointId}`);
 export const getMajorCities = () => api.get('/geography/cities/major');
+// Точки в видимой области карты: bounds — { south, west, north, east }
+export const getPointsInBounds = (bounds, params = {}) =>
+  api.get('/geography/bbox', { params: { ...bounds, ...params } });
+export const getNearestPoints = (lat, lon, k = 10, params = {}) =>
+  api.get('/geography/near', { params: { lat, lon, k, ...params } });
+// Кластеры маркеров для масштаба карты zoom в видимой области bounds
+export const getMapClusters = (zoom, bounds, params = {}) =>
+  api.get('/geography/clusters', { params: { zoom, ...bounds, ...params } });
 
 // Галерея
 export const getGalleryImages = (params = {}) => 
@@ -34,7 +52,15 @@ export const getGalleryImage = (imageId) => api.get(`/gallery/${imageId}`);
 export const getRandomQuestions = (params = {}) => 
   api.get('/quiz/questions/random', { params });
 export const checkAnswer = (data) => api.post('/quiz/check-answer', data);
+// Сессия викторины: вопросы выдаются вместе с session_id,
+// все ответы проверяются одним запросом checkAnswers({ session_id, answers })
+export const startQuizSession = (params = {}) => api.post('/quiz/sessions', params);
+export const checkAnswers = (data) => api.post('/quiz/check-answers', data);
 export const getQuizCategories = () => api.get('/quiz/categories');
+// Таблица лидеров: очки засчитываются через checkAnswers({ session_id, answers, player })
+export const getLeaderboard = (params = {}) => api.get('/quiz/leaderboard', { params });
+export const getPlayerRank = (player) =>
+  api.get(`/quiz/leaderboard/${encodeURIComponent(player)}`);
 
 // Факты
 export const getFacts = (category = null) => 